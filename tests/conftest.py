@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,18 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def sync_thumbnails(settings):
+    # временный MEDIA_ROOT удаляется сразу после теста,
+    # поэтому миниатюры режем в том же потоке
+    settings.POST_THUMBNAIL_EXECUTOR = 'sync'
+
+
+@pytest.fixture(autouse=True)
+def fail_on_nplusone(request, settings):
+    # N+1 в представлениях posts роняет тест; разрешить можно меткой
+    # @pytest.mark.allow_nplusone
+    if request.node.get_closest_marker('allow_nplusone') is None:
+        settings.NPLUSONE_MODE = 'raise'
@@ -0,0 +1,103 @@
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+from core import db_router, metrics, profiling
+
+LOCK_TIMEOUT = 10
+# Сколько ждать чужого пересчёта, когда прежнего значения нет (например,
+# сразу после bump_version), и как часто проверять кеш.
+LOCK_WAIT = 2
+LOCK_POLL = 0.05
+
+
+def version_key(*scope):
+    return ':'.join(['version', *map(str, scope)])
+
+
+def _initial_version():
+    # Отметка времени вместо единицы: если ключ версии вытеснят из кеша,
+    # новая версия не совпадёт ни с одной из прежних.
+    return int(time.time() * 1000)
+
+
+def get_version(*scope):
+    """Текущее поколение данных области scope для ключей кеша."""
+    key = version_key(*scope)
+    version = cache.get(key)
+    if version is None:
+        version = _initial_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(*scope):
+    """Делает устаревшими все ключи, собранные с версией scope."""
+    key = version_key(*scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+
+
+def versioned_key(name, *scope):
+    return ':'.join([name, *map(str, scope), str(get_version(*scope))])
+
+
+def record_hit(kind, hit):
+    """Отмечает обращение к кешу в профиле запроса и в метриках."""
+    profiling.record_cache(hit)
+    metrics.CACHE_REQUESTS.inc(kind, 'hit' if hit else 'miss')
+
+
+def _wait_for(key, lock_key):
+    """Запись, которую кладёт держатель блокировки, или None."""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None or cache.get(lock_key) is None:
+            return entry
+    return None
+
+
+def get_or_recompute(key, compute, timeout, beta=1.0, kind='default'):
+    """Значение из кеша с защитой от одновременного пересчёта.
+
+    Запись пересчитывается чуть раньше срока с вероятностью, растущей к
+    его концу (probabilistic early expiration), а пересчитывает её только
+    тот, кто взял блокировку через cache.add; остальные тем временем
+    отдают прежнее значение. Запись хранится вдвое дольше timeout, чтобы
+    такое значение было под рукой. Если прежнего значения нет (ключ
+    сменился вместе с версией), остальные до LOCK_WAIT секунд ждут
+    результата пересчёта. Пересчёт читает из основной базы.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires = entry
+        early = delta * beta * math.log(1 - random.random())
+        if time.time() - early < expires:
+            record_hit(kind, True)
+            return value
+    lock_key = f'{key}:lock'
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if not locked:
+        if entry is None:
+            entry = _wait_for(key, lock_key)
+        if entry is not None:
+            record_hit(kind, True)
+            return entry[0]
+    record_hit(kind, False)
+    try:
+        start = time.time()
+        with db_router.primary():
+            value = compute()
+        delta = time.time() - start
+        cache.set(key, (value, delta, time.time() + timeout), timeout * 2)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
@@ -0,0 +1,259 @@
+"""Кеш в одном файле SQLite, общий для всех воркеров на машине.
+
+LocMemCache у каждого процесса свой: фрагменты и ленты собираются
+заново в каждом воркере, а bump_version одного воркера не видят
+остальные. Здесь записи лежат в файле в режиме WAL: читатели не ждут
+писателей, add и incr выполняются в транзакции BEGIN IMMEDIATE и
+атомарны между процессами. При переполнении сначала удаляются
+просроченные записи, затем давно не читанные (LRU).
+
+    CACHES = {'default': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': '/dev/shm/yatube-cache.sqlite3',
+    }}
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache_entry ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, '
+    'accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_entry_accessed '
+    'ON cache_entry (accessed)',
+)
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+}
+# Время чтения обновляется не чаще раза в секунду, чтобы горячие ключи
+# не превращали каждое чтение в запись.
+ACCESS_RESOLUTION = 1
+# Число записей сверяется с MAX_ENTRIES не на каждой записи, а раз в
+# столько записей воркера (для маленьких MAX_ENTRIES — чаще).
+CULL_EVERY = 50
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+        self._cull_every = max(1, min(CULL_EVERY, self._max_entries // 10))
+        self._writes = 0
+
+    def _connection(self):
+        # после fork (gunicorn --preload) соединение родителя не годится
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=PRAGMAS['busy_timeout'] / 1000,
+                isolation_level=None, check_same_thread=False
+            )
+            for name, value in PRAGMAS.items():
+                connection.execute(f'PRAGMA {name} = {value}')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expires(self, timeout):
+        # None — хранить бессрочно; 0 и меньше — запись уже просрочена
+        return self.get_backend_timeout(timeout)
+
+    def _touch_accessed(self, keys, now):
+        if not keys:
+            return
+        # отметка для LRU не стоит того, чтобы ждать писателя: без
+        # busy_timeout занятая база сразу отвечает SQLITE_BUSY
+        connection = self._connection()
+        connection.execute('PRAGMA busy_timeout = 0')
+        try:
+            with self._transaction() as connection:
+                connection.executemany(
+                    'UPDATE cache_entry SET accessed = ? WHERE key = ?',
+                    ((now, key) for key in keys)
+                )
+        except sqlite3.OperationalError:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+        finally:
+            connection.execute(
+                f"PRAGMA busy_timeout = {PRAGMAS['busy_timeout']}"
+            )
+
+    def _fetch(self, keys):
+        if not keys:
+            return {}
+        now = time.time()
+        rows = self._connection().execute(
+            'SELECT key, value, expires, accessed FROM cache_entry '
+            f'WHERE key IN ({", ".join("?" * len(keys))})', keys
+        ).fetchall()
+        found = {}
+        stale = []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            found[key] = pickle.loads(value)
+            if accessed < now - ACCESS_RESOLUTION:
+                stale.append(key)
+        self._touch_accessed(stale, now)
+        return found
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._fetch([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        return {
+            keys[key]: value
+            for key, value in self._fetch(list(keys)).items()
+        }
+
+    def _store(self, connection, key, value, timeout, now):
+        connection.execute(
+            'INSERT OR REPLACE INTO cache_entry (key, value, expires, '
+            'accessed) VALUES (?, ?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             self._expires(timeout), now)
+        )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self._transaction() as connection:
+            self._cull(connection, 1)
+            self._store(connection, key, value, timeout, time.time())
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        with self._transaction() as connection:
+            self._cull(connection, len(data))
+            for key, value in data.items():
+                self._store(
+                    connection, self._key(key, version), value, timeout, now
+                )
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                'SELECT expires FROM cache_entry WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and (row[0] is None or row[0] > now):
+                return False
+            self._cull(connection, 1)
+            self._store(connection, key, value, timeout, now)
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                'SELECT value, expires FROM cache_entry WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache_entry SET value = ?, accessed = ? '
+                'WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now, key)
+            )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as connection:
+            updated = connection.execute(
+                'UPDATE cache_entry SET expires = ?, accessed = ? '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (self._expires(timeout), now, key, now)
+            ).rowcount
+        return bool(updated)
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._connection().execute(
+            'SELECT 1 FROM cache_entry WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        with self._transaction() as connection:
+            connection.executemany(
+                'DELETE FROM cache_entry WHERE key = ?',
+                ((key,) for key in keys)
+            )
+
+    def clear(self):
+        with self._transaction() as connection:
+            connection.execute('DELETE FROM cache_entry')
+
+    def _cull(self, connection, incoming):
+        self._writes += incoming
+        if self._writes < self._cull_every:
+            return
+        self._writes = 0
+        count, = connection.execute(
+            'SELECT COUNT(*) FROM cache_entry'
+        ).fetchone()
+        if count + incoming <= self._max_entries:
+            return
+        connection.execute(
+            'DELETE FROM cache_entry WHERE expires <= ?', (time.time(),)
+        )
+        count, = connection.execute(
+            'SELECT COUNT(*) FROM cache_entry'
+        ).fetchone()
+        if count + incoming <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            connection.execute('DELETE FROM cache_entry')
+            return
+        connection.execute(
+            'DELETE FROM cache_entry WHERE key IN (SELECT key FROM '
+            'cache_entry ORDER BY accessed LIMIT ?)',
+            (max(count // self._cull_frequency, count + incoming
+                 - self._max_entries),)
+        )
+
+    def close(self, **kwargs):
+        # соединения живут столько же, сколько поток воркера
+        pass
@@ -0,0 +1,88 @@
+"""Чтение с реплик, запись в основную базу.
+
+Запросы на чтение уходят на случайную реплику из DATABASE_REPLICAS.
+Основная база читается, если запрос пишет (не GET/HEAD), если идёт
+транзакция, и в течение REPLICA_PIN_SECONDS после записи — чтобы
+пользователь сразу видел свой пост или комментарий, даже пока реплика
+отстаёт. Из основной базы собирается и всё, что кладётся в кеш: запись
+сдвигает версии кеша сразу, и страница, собранная с отстающей реплики,
+легла бы под новую версию на весь срок хранения.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+WRITE_STATEMENTS = {'INSERT', 'UPDATE', 'DELETE', 'REPLACE'}
+
+_pinned = ContextVar('primary_pinned', default=False)
+
+
+def pin():
+    """Направляет чтения в основную базу до unpin(token)."""
+    return _pinned.set(True)
+
+
+def unpin(token):
+    _pinned.reset(token)
+
+
+@contextmanager
+def primary():
+    """Все чтения внутри блока идут в основную базу."""
+    token = pin()
+    try:
+        yield
+    finally:
+        unpin(token)
+
+
+def is_write(sql):
+    words = sql.split(None, 1)
+    return bool(words) and words[0].upper() in WRITE_STATEMENTS
+
+
+@contextmanager
+def track_writes():
+    """Отмечает, была ли запись в основную базу; возвращает список-флаг.
+
+    Смотрит на выполненные запросы, а не на db_for_write: роутер
+    спрашивают и без записи, например чтобы узнать СУБД.
+    """
+    flag = []
+
+    def record(execute, sql, params, many, context):
+        if not flag and is_write(sql):
+            flag.append(True)
+        return execute(sql, params, many, context)
+
+    with connections[DEFAULT_DB_ALIAS].execute_wrapper(record):
+        yield flag
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or _pinned.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
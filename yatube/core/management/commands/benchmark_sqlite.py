@@ -0,0 +1,158 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.metrics import percentile
+
+SCHEMA = (
+    'CREATE TABLE post (id INTEGER PRIMARY KEY, created REAL, text TEXT)',
+    'CREATE INDEX post_created ON post (created)',
+    'CREATE TABLE comment (id INTEGER PRIMARY KEY, post_id INTEGER, '
+    'created REAL, text TEXT)',
+    'CREATE INDEX comment_post_created ON comment (post_id, created)',
+)
+READ_FEED = 'SELECT id, text FROM post ORDER BY created DESC LIMIT 10 OFFSET ?'
+READ_COMMENTS = (
+    'SELECT id, text FROM comment WHERE post_id = ? ORDER BY created LIMIT 20'
+)
+WRITE_COMMENT = 'INSERT INTO comment (post_id, created, text) VALUES (?, ?, ?)'
+
+
+def profiles():
+    """Как Django ходит в SQLite по умолчанию и с SQLITE_PRAGMAS."""
+    return {
+        'default': {'pragmas': {}, 'persistent': False},
+        'tuned': {'pragmas': settings.SQLITE_PRAGMAS, 'persistent': True},
+    }
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None,
+                                 check_same_thread=False)
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+
+class Worker(threading.Thread):
+    def __init__(self, path, profile, deadline, write, posts):
+        super().__init__(daemon=True)
+        self.path = path
+        self.profile = profile
+        self.deadline = deadline
+        self.write = write
+        self.posts = posts
+        self.timings = []
+        self.errors = 0
+        self.connection = None
+
+    def get_connection(self):
+        if self.connection is None:
+            self.connection = connect(self.path, self.profile['pragmas'])
+        return self.connection
+
+    def operation(self, connection):
+        post_id = random.randint(1, self.posts)
+        if self.write:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                WRITE_COMMENT, (post_id, time.time(), 'комментарий ' * 20)
+            )
+            connection.execute('COMMIT')
+        else:
+            connection.execute(
+                READ_FEED, (random.randrange(0, 100) * 10,)
+            ).fetchall()
+            connection.execute(READ_COMMENTS, (post_id,)).fetchall()
+
+    def run(self):
+        while time.perf_counter() < self.deadline:
+            start = time.perf_counter()
+            connection = self.get_connection()
+            try:
+                self.operation(connection)
+            except sqlite3.OperationalError:
+                self.errors += 1
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+            else:
+                self.timings.append((time.perf_counter() - start) * 1000)
+            if not self.profile['persistent']:
+                connection.close()
+                self.connection = None
+        if self.connection is not None:
+            self.connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает конкурентные чтения и записи SQLite с настройками '
+            'по умолчанию и с SQLITE_PRAGMAS и постоянными соединениями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=5)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--posts', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        report = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, profile in profiles().items():
+                path = os.path.join(directory, f'{name}.sqlite3')
+                self.prepare(path, profile, options['posts'])
+                report[name] = self.measure(path, profile, options)
+                self.stderr.write(
+                    f"{name}: чтений {report[name]['reads_per_second']}/с, "
+                    f"записей {report[name]['writes_per_second']}/с"
+                )
+        self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+
+    def prepare(self, path, profile, posts):
+        connection = connect(path, profile['pragmas'])
+        for statement in SCHEMA:
+            connection.execute(statement)
+        now = time.time()
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO post (created, text) VALUES (?, ?)',
+            ((now - i, 'пост ' * 50) for i in range(posts))
+        )
+        connection.execute('COMMIT')
+        connection.close()
+
+    def measure(self, path, profile, options):
+        deadline = time.perf_counter() + options['duration']
+        workers = [
+            Worker(path, profile, deadline, write, options['posts'])
+            for write, count in (
+                (False, options['readers']), (True, options['writers'])
+            )
+            for _ in range(count)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        result = {}
+        for kind, write in (('reads', False), ('writes', True)):
+            timings = [
+                timing for worker in workers if worker.write == write
+                for timing in worker.timings
+            ]
+            result[f'{kind}_per_second'] = round(
+                len(timings) / options['duration']
+            )
+            result[f'{kind}_p95_ms'] = round(
+                percentile(timings, 95), 2
+            ) if timings else None
+            result[f'{kind}_errors'] = sum(
+                worker.errors for worker in workers if worker.write == write
+            )
+        return result
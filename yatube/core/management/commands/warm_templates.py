@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_warmup import compile_templates, uses_cached_loader
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны из TEMPLATES[\'DIRS\'] и выводит '
+            'время компиляции каждого, от самых медленных.')
+
+    def handle(self, *args, **options):
+        if not uses_cached_loader():
+            self.stderr.write(
+                'Кешированный загрузчик выключен (DEBUG или dev-настройки): '
+                'шаблоны будут компилироваться при каждом запросе.'
+            )
+        results = compile_templates()
+        failed = []
+        for name, seconds, error in sorted(
+            results, key=lambda result: result[1], reverse=True
+        ):
+            if error is not None:
+                failed.append(name)
+                self.stderr.write(self.style.ERROR(f'{name}: {error}'))
+            else:
+                self.stdout.write(f'{seconds * 1000:8.2f} ms  {name}')
+        total = sum(seconds for _, seconds, _ in results)
+        self.stdout.write(
+            f'{total * 1000:8.2f} ms  всего, шаблонов: {len(results)}'
+        )
+        if failed:
+            raise CommandError(
+                f'Не скомпилированы: {", ".join(failed)}.'
+            )
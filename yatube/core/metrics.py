@@ -0,0 +1,282 @@
+"""Метрики процесса в текстовом формате Prometheus.
+
+Реестр живёт в памяти процесса. Пока воркер один, /metrics отдаёт его
+значения как есть. Если воркеров несколько за одним портом, каждый
+запрос Prometheus попадает к случайному из них, и счётчики скачут
+назад; тогда задайте METRICS_DIR: воркеры раз в FLUSH_INTERVAL секунд
+пишут туда снимки своих реестров, а /metrics складывает снимки всех
+процессов. Снимки завершившихся воркеров остаются в сумме, поэтому
+каталог очищают только при перезапуске сервера. Миниатюры, нарезанные
+в пуле процессов, сюда не попадают.
+"""
+import copy
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+FLUSH_INTERVAL = 1
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    values = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labels):
+            raise ValueError(
+                f'{self.name} expects labels {self.labels}, got {labels}'
+            )
+        return tuple(str(label) for label in labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def empty_copy(self):
+        metric = copy.copy(self)
+        metric._values = {}
+        metric._lock = threading.Lock()
+        return metric
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, value in snapshot:
+                key = tuple(key)
+                self._values[key] = self._add(self._values.get(key), value)
+
+    def expose(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(
+                line for key, value in items
+                for line in self._samples(key, value)
+            )
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(self._key(labels), 0)
+
+    @staticmethod
+    def _add(current, value):
+        return (current or 0) + value
+
+    def _samples(self, key, value):
+        yield (f'{self.name}{_format_labels(self.labels, key)} '
+               f'{_format_value(value)}')
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(
+                key, ([0] * (len(self.buckets) + 1), 0)
+            )
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, *labels):
+        counts, _ = self._values.get(self._key(labels), ((), 0))
+        return sum(counts)
+
+    @staticmethod
+    def _add(current, value):
+        counts, total = value
+        if current is None:
+            return list(counts), total
+        return (
+            [mine + theirs for mine, theirs in zip(current[0], counts)],
+            current[1] + total
+        )
+
+    def _samples(self, key, value):
+        counts, total = value
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            labels = _format_labels(self.labels, key, [('le', bound)])
+            yield f'{self.name}_bucket{labels} {cumulative}'
+        labels = _format_labels(self.labels, key)
+        yield f'{self.name}_sum{labels} {_format_value(float(total))}'
+        yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def snapshot(self):
+        return {
+            name: metric.snapshot() for name, metric in self._metrics.items()
+        }
+
+    def merged(self, snapshots):
+        """Новый реестр с теми же метриками и суммой снимков."""
+        registry = Registry()
+        for metric in self._metrics.values():
+            metric = registry.register(metric.empty_copy())
+            for snapshot in snapshots:
+                metric.merge(snapshot.get(metric.name, []))
+        return registry
+
+    def expose(self):
+        return '\n'.join(
+            line for metric in self._metrics.values()
+            for line in metric.expose()
+        ) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'yatube_request_duration_seconds',
+    'Время обработки запроса по имени маршрута.',
+    ('view',)
+)
+REQUESTS = REGISTRY.counter(
+    'yatube_requests_total',
+    'Число ответов по имени маршрута и коду статуса.',
+    ('view', 'status')
+)
+REQUEST_QUERIES = REGISTRY.histogram(
+    'yatube_request_queries',
+    'Число SQL-запросов на один HTTP-запрос.',
+    ('view',),
+    buckets=QUERY_BUCKETS
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'yatube_cache_requests_total',
+    'Обращения к кешу по виду кеша и результату (hit или miss).',
+    ('cache', 'result')
+)
+THUMBNAIL_DURATION = REGISTRY.histogram(
+    'yatube_thumbnail_seconds',
+    'Время нарезки миниатюр и вариантов картинок.',
+    ('kind',)
+)
+
+_snapshot_name = None
+_flushed = 0.0
+
+
+def _start_process():
+    # pid повторяется между перезапусками, суффикс — нет
+    global _snapshot_name, _flushed
+    _snapshot_name = f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+    _flushed = 0.0
+
+
+def _after_fork():
+    # значения мастера до fork уже учтены в его собственном снимке
+    REGISTRY.clear()
+    _start_process()
+
+
+_start_process()
+# register_at_fork есть только на POSIX; без fork нечего и сбрасывать
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def flush(directory, force=False):
+    """Пишет снимок реестра процесса в directory не чаще FLUSH_INTERVAL."""
+    global _flushed
+    now = time.monotonic()
+    if not force and now - _flushed < FLUSH_INTERVAL:
+        return
+    _flushed = now
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _snapshot_name)
+    temporary = f'{path}.{threading.get_ident()}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(REGISTRY.snapshot(), file)
+    os.replace(temporary, path)
+
+
+def collect(directory):
+    """Сумма снимков всех процессов в формате Prometheus."""
+    flush(directory, force=True)
+    snapshots = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+    return REGISTRY.merged(snapshots).expose()
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from core import db_router, metrics, profiling
+from core.nplusone import NPlusOneDetector, NPlusOneError
+from core.cache import get_version, record_hit
+
+logger = logging.getLogger('core.profiling')
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+PIN_COOKIE = 'primary_until'
+
+
+class ReplicaPinningMiddleware:
+    """Read-your-writes поверх PrimaryReplicaRouter.
+
+    Пишущие запросы целиком читают из основной базы. Если запрос что-то
+    записал, браузер получает cookie, и следующие REPLICA_PIN_SECONDS
+    секунд его запросы тоже читают из основной базы.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        with ExitStack() as stack:
+            if self._is_pinned(request):
+                stack.enter_context(db_router.primary())
+            wrote = stack.enter_context(db_router.track_writes())
+            response = self.get_response(request)
+        if wrote:
+            pin_seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time() + pin_seconds)),
+                max_age=pin_seconds, httponly=True, samesite='Lax'
+            )
+        return response
+
+    @staticmethod
+    def _is_pinned(request):
+        if request.method not in SAFE_METHODS:
+            return True
+        try:
+            return int(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+class AnonymousPageCacheMiddleware:
+    """Кеширует целые страницы для анонимных посетителей.
+
+    Кешируются только представления из PAGE_CACHE_VIEWS; ключ строится по
+    пути с query string и поколению 'pages', которое сдвигают сигналы
+    при изменении постов, комментариев, групп и подписок. Авторизованные
+    пользователи всегда получают свежую страницу. Промах кеша читает из
+    основной базы, а не из реплики.
+
+    Стоит первым в MIDDLEWARE: решение о сохранении принимается, когда
+    сессии, CSRF и сообщения уже поставили свои cookie, и страница с
+    чужими cookie или CSRF-токеном в кеш не попадает.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            token = getattr(request, '_page_cache_pin', None)
+            if token is not None:
+                db_router.unpin(token)
+        key = getattr(request, '_page_cache_key', None)
+        if key is not None and self._is_cacheable(request, response):
+            patch_vary_headers(response, ('Cookie',))
+            cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        if (
+            request.method not in SAFE_METHODS
+            or view_name not in settings.PAGE_CACHE_VIEWS
+            or request.user.is_authenticated
+        ):
+            return None
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = f'page:{get_version("pages")}:{path}'
+        response = cache.get(key)
+        record_hit('page', response is not None)
+        if response is not None:
+            return response
+        request._page_cache_key = key
+        request._page_cache_pin = db_router.pin()
+        return None
+
+    @staticmethod
+    def _is_cacheable(request, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED')
+            and not request.user.is_authenticated
+        )
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Собирает метрики ответов по имени маршрута для /metrics."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.REQUEST_DURATION.observe(duration, view)
+        metrics.REQUESTS.inc(view, response.status_code)
+        metrics.REQUEST_QUERIES.observe(counter.count, view)
+        if settings.METRICS_DIR:
+            metrics.flush(settings.METRICS_DIR)
+        return response
+
+
+class RequestProfilingMiddleware:
+    """Профилирует долю запросов REQUEST_PROFILING_SAMPLE_RATE.
+
+    Число и суммарное время SQL-запросов, повторы одинаковых запросов,
+    время отрисовки шаблонов и попадания в кеш уходят в заголовок
+    Server-Timing и одной JSON-строкой в лог core.profiling.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        profiling.install_template_timing()
+
+    def __call__(self, request):
+        if random.random() >= settings.REQUEST_PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        profile = profiling.RequestProfile()
+        token = profiling.activate(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            profiling.deactivate(token)
+        self.report(request, response, profile)
+        return response
+
+    @staticmethod
+    def report(request, response, profile):
+        total = profile.total_time() * 1000
+        sql = profile.sql_time * 1000
+        templates = profile.template_time * 1000
+        response['Server-Timing'] = ', '.join((
+            f'sql;dur={sql:.1f};desc="{profile.query_count} queries, '
+            f'{profile.duplicate_count} duplicates"',
+            f'tpl;dur={templates:.1f}',
+            f'cache;desc="{profile.cache_hits} hits, '
+            f'{profile.cache_misses} misses"',
+            f'total;dur={total:.1f}',
+        ))
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total, 2),
+            'sql_ms': round(sql, 2),
+            'queries': profile.query_count,
+            'duplicates': profile.duplicate_count,
+            'top_duplicates': profile.top_duplicates(),
+            'template_ms': round(templates, 2),
+            'cache_hits': profile.cache_hits,
+            'cache_misses': profile.cache_misses,
+        }, ensure_ascii=False))
+
+
+class NPlusOneMiddleware:
+    """Ищет N+1 в представлениях пространств имён NPLUSONE_NAMESPACES.
+
+    NPLUSONE_MODE = 'log' пишет найденное в лог core.nplusone,
+    'raise' роняет запрос (в тестах — сам тест), None выключает проверку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.NPLUSONE_MODE:
+            return self.get_response(request)
+        detector = NPlusOneDetector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(detector))
+            response = self.get_response(request)
+        match = request.resolver_match
+        if (
+            match is None
+            or match.namespace not in settings.NPLUSONE_NAMESPACES
+            or not detector.problems()
+        ):
+            return response
+        report = detector.report(match.view_name)
+        if settings.NPLUSONE_MODE == 'raise':
+            raise NPlusOneError(report)
+        logging.getLogger('core.nplusone').warning(report)
+        return response
@@ -0,0 +1,92 @@
+"""Поиск N+1: один и тот же запрос, повторённый с разными параметрами.
+
+SQL в execute_wrapper приходит с плейсхолдерами, поэтому форма запроса —
+его текст с развёрнутыми в одно IN-списками. Для каждой формы
+запоминается место вызова: строка шаблона, если запрос пришёл из
+отрисовки, иначе ближайший кадр кода проекта.
+"""
+import os
+import re
+import sys
+
+from django.conf import settings
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SITE_PACKAGES = ('site-packages', 'dist-packages')
+DJANGO_DB = os.path.join('django', 'db', '')
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def query_shape(sql):
+    return IN_LIST.sub('IN (...)', sql)
+
+
+def _is_project_file(filename):
+    return filename.startswith(PROJECT_DIR) and not any(
+        part in filename for part in SITE_PACKAGES
+    )
+
+
+def query_origin():
+    """Строка шаблона или кода проекта, откуда выполнен запрос."""
+    frame = sys._getframe(1)
+    code_origin = None
+    # кадры до входа в django.db — это обёртки execute_wrapper
+    seen_db = False
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                name = origin.template_name or origin.name
+                return f'{name}:{token.lineno}'
+        filename = frame.f_code.co_filename
+        if DJANGO_DB in filename:
+            seen_db = True
+        elif seen_db and code_origin is None and _is_project_file(filename):
+            code_origin = (
+                f'{os.path.relpath(filename, PROJECT_DIR)}:{frame.f_lineno}'
+            )
+        frame = frame.f_back
+    return code_origin or 'unknown'
+
+
+class NPlusOneDetector:
+    """execute_wrapper, собирающий формы запросов за один запрос."""
+
+    def __init__(self, threshold=None, ignore=None):
+        self.threshold = (
+            settings.NPLUSONE_THRESHOLD if threshold is None else threshold
+        )
+        self.ignore = settings.NPLUSONE_IGNORE if ignore is None else ignore
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and not any(name in sql for name in self.ignore):
+            shape = query_shape(sql)
+            params_seen, origins = self.shapes.setdefault(
+                shape, (set(), set())
+            )
+            params_seen.add(repr(params))
+            if len(params_seen) <= self.threshold:
+                origins.add(query_origin())
+        return execute(sql, params, many, context)
+
+    def problems(self):
+        return [
+            (shape, len(params), sorted(origins))
+            for shape, (params, origins) in self.shapes.items()
+            if len(params) >= self.threshold
+        ]
+
+    def report(self, label=''):
+        lines = [f'N+1 queries{f" in {label}" if label else ""}:']
+        for shape, count, origins in self.problems():
+            lines.append(f'  {count}x {shape}')
+            lines.extend(f'    at {origin}' for origin in origins)
+        return '\n'.join(lines)
@@ -0,0 +1,202 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+
+from core.cache import get_or_recompute
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class CursorPage(Sequence):
+    """Страница ленты без номера: только ссылки вперёд и назад."""
+
+    is_cursor = True
+    number = None
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def boundary(self):
+        """Первый и последний ключ страницы — для ключей кеша.
+
+        Сырой ?cursor= может быть любым; таких границ не больше, чем
+        страниц в самих данных.
+        """
+        if not self.object_list:
+            return ''
+        return f'{self.object_list[0].pk}-{self.object_list[-1].pk}'
+
+
+class KeysetPaginator:
+    """Постраничный вывод по ключу сортировки вместо OFFSET.
+
+    Следующая страница выбирается условием «строго после последней
+    записи», поэтому глубина страницы не влияет на стоимость запроса,
+    а COUNT(*) не выполняется вовсе. Последнее поле сортировки должно
+    быть уникальным (обычно первичный ключ).
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-created', '-id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        opts = object_list.model._meta
+        self.fields = [
+            opts.get_field(name.lstrip('-')) for name in self.ordering
+        ]
+
+    def get_page(self, cursor):
+        """Возвращает страницу; битый курсор ведёт на первую страницу."""
+        try:
+            direction, values = self.decode_cursor(cursor)
+        except ValueError:
+            direction, values = NEXT, None
+        if values is None:
+            return self._page_after(None, has_previous=False)
+        if direction == PREVIOUS:
+            return self._page_before(values)
+        return self._page_after(values, has_previous=True)
+
+    def encode_cursor(self, obj, direction):
+        values = [
+            field.value_to_string(obj) for field in self.fields
+        ]
+        raw = json.dumps([direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return NEXT, None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, values = json.loads(raw.decode())
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+        if direction not in (NEXT, PREVIOUS) or (
+            not isinstance(values, list) or len(values) != len(self.fields)
+        ):
+            raise ValueError('Invalid cursor')
+        try:
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise ValueError('Invalid cursor')
+        return direction, values
+
+    def _keyset_filter(self, values, reverse):
+        """Условие «строго после values» в порядке сортировки."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            descending = name.startswith('-')
+            field = name.lstrip('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    def _reversed_ordering(self):
+        return [
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        ]
+
+    def _page_after(self, values, has_previous):
+        queryset = self.object_list.order_by(*self.ordering)
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, False))
+        items = list(queryset[:self.per_page + 1])
+        has_next = len(items) > self.per_page
+        items = items[:self.per_page]
+        return self._make_page(items, has_next, has_previous and bool(items))
+
+    def _page_before(self, values):
+        queryset = self.object_list.order_by(
+            *self._reversed_ordering()
+        ).filter(self._keyset_filter(values, True))
+        items = list(queryset[:self.per_page + 1])
+        if len(items) <= self.per_page:
+            return self._page_after(None, has_previous=False)
+        items = items[:self.per_page][::-1]
+        return self._make_page(items, True, True)
+
+    def _make_page(self, items, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = self.encode_cursor(items[-1], NEXT)
+        if items and has_previous:
+            previous_cursor = self.encode_cursor(items[0], PREVIOUS)
+        return CursorPage(items, next_cursor, previous_cursor)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, берущий COUNT(*) из кеша по ключу count_key."""
+
+    def __init__(self, object_list, per_page, count_key, timeout, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.timeout = timeout
+
+    @cached_property
+    def count(self):
+        return get_or_recompute(
+            self.count_key, lambda: Paginator.count.func(self), self.timeout,
+            kind='count'
+        )
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для огромных таблиц: без фильтров не считает строки.
+
+    Число строк неотфильтрованной выборки оценивается по статистике
+    PostgreSQL или по MAX(pk), который берётся из индекса. Оценка
+    завышена на число удалённых строк, поэтому последние страницы
+    могут оказаться пустыми — для админки это приемлемо.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if getattr(queryset, 'query', None) is None or queryset.query.where:
+            return Paginator.count.func(self)
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] > 0:
+                return int(row[0])
+        return queryset.order_by().aggregate(last=Max('pk'))['last'] or 0
@@ -0,0 +1,92 @@
+"""Профиль одного запроса: SQL, отрисовка шаблонов и кеш.
+
+Профиль текущего запроса лежит в contextvar, поэтому код вне
+middleware (например, core.cache) отмечает в нём попадания в кеш, не
+зная о запросе. Когда профиль не собирается, отметки ничего не стоят.
+"""
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.template.base import Template
+
+_current = ContextVar('request_profile', default=None)
+_original_render = Template.render
+
+
+class RequestProfile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = Counter()
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    @property
+    def duplicate_count(self):
+        return sum(count - 1 for count in self.queries.values())
+
+    def top_duplicates(self, limit=3):
+        return [
+            {'sql': sql, 'count': count}
+            for (sql, params), count in self.queries.most_common(limit)
+            if count > 1
+        ]
+
+    def total_time(self):
+        return time.perf_counter() - self.start
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries[sql, repr(params)] += 1
+
+
+def current():
+    return _current.get()
+
+
+def activate(profile):
+    return _current.set(profile)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def record_cache(hit):
+    profile = _current.get()
+    if profile is None:
+        return
+    if hit:
+        profile.cache_hits += 1
+    else:
+        profile.cache_misses += 1
+
+
+def _timed_render(self, context):
+    profile = _current.get()
+    if profile is None:
+        return _original_render(self, context)
+    # вложенные {% include %} уже входят во время внешнего шаблона
+    profile.template_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        profile.template_depth -= 1
+        if not profile.template_depth:
+            profile.template_time += time.perf_counter() - start
+
+
+def install_template_timing():
+    Template.render = _timed_render
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+INCOMING_DIR = '.incoming'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит каждый файл один раз под именем из его SHA-256.
+
+    Файл `posts/photo.jpg` сохраняется как `posts/ab/cd/abcd….jpg`:
+    одинаковые загрузки получают одно имя, поэтому и миниатюры sorl,
+    ключом которых служит имя, у них общие. Содержимое хешируется
+    при записи во временный файл за один проход, а затем временный
+    файл становится блобом или удаляется, если такой блоб уже есть.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def digest_name(self, name, digest):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            directory, digest[:2], digest[2:4], digest + extension
+        )
+
+    def _makedirs(self, directory):
+        os.makedirs(directory, exist_ok=True)
+
+    def _save(self, name, content):
+        incoming = self.path(INCOMING_DIR)
+        self._makedirs(incoming)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=incoming)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            name = self.digest_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            self._makedirs(os.path.dirname(full_path))
+            try:
+                os.link(temp_path, full_path)
+            except FileExistsError:
+                pass
+            except OSError:
+                os.replace(temp_path, full_path)
+            if self.file_permissions_mode is not None:
+                os.chmod(full_path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return name.replace('\\', '/')
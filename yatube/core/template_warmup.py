@@ -0,0 +1,68 @@
+"""Компиляция шаблонов проекта заранее, до первого запроса.
+
+Кешированный загрузчик держит скомпилированные шаблоны в памяти процесса,
+но заполняет кеш только по мере запросов: первая лента в каждом воркере
+разбирает base.html, header.html, paginator.html и остальные включения.
+warm() проходит по всем шаблонам из TEMPLATES['DIRS'] сразу; при
+gunicorn --preload кеш заполняется один раз в мастере и достаётся
+воркерам после fork.
+"""
+import logging
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger('core.templates')
+
+
+def _engine():
+    return engines['django'].engine
+
+
+def template_names(engine=None):
+    engine = engine or _engine()
+    names = set()
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                if file.endswith('.html'):
+                    path = os.path.relpath(os.path.join(root, file), directory)
+                    names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def uses_cached_loader(engine=None):
+    engine = engine or _engine()
+    return any(
+        isinstance(loader, CachedLoader) for loader in engine.template_loaders
+    )
+
+
+def compile_templates(names=None):
+    """[(имя, секунды, ошибка или None)] для каждого шаблона."""
+    engine = _engine()
+    results = []
+    for name in template_names(engine) if names is None else names:
+        start = time.perf_counter()
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as error:
+            results.append((name, time.perf_counter() - start, error))
+        else:
+            results.append((name, time.perf_counter() - start, None))
+    return results
+
+
+def warm():
+    """Заполняет кеш загрузчика; без кешированного загрузчика — ничего."""
+    if not uses_cached_loader():
+        return []
+    results = compile_templates()
+    for name, _, error in results:
+        if error is not None:
+            logger.warning('Шаблон %s не скомпилирован: %s', name, error)
+    logger.info('Шаблонов скомпилировано: %d за %.1f мс', len(results),
+                sum(seconds for _, seconds, _ in results) * 1000)
+    return results
@@ -0,0 +1,55 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache import get_or_recompute, get_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def cache_version(*scope):
+    return get_version(*scope)
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, timeout_var, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout_var = timeout_var
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        try:
+            timeout = int(self.timeout_var.resolve(context))
+        except (template.VariableDoesNotExist, TypeError, ValueError):
+            raise template.TemplateSyntaxError(
+                f'"fragmentcache" tag got a non-integer timeout value: '
+                f'{self.timeout_var.var!r}'
+            )
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = make_template_fragment_key(self.fragment_name, vary_on)
+        return get_or_recompute(
+            key, lambda: self.nodelist.render(context), timeout,
+            kind='fragment'
+        )
+
+
+@register.tag
+def fragmentcache(parser, token):
+    """Как {% cache %}, но без лавины пересчётов при истечении срока.
+
+    {% fragmentcache 600 name var1 var2 %} ... {% endfragmentcache %}
+    """
+    nodelist = parser.parse(('endfragmentcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{tokens[0]}' tag requires at least 2 arguments."
+        )
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
@@ -0,0 +1,72 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase
+
+from core.cache import bump_version, get_or_recompute, get_version
+
+
+class VersionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_changes_only_its_scope(self):
+        feed = get_version('feed')
+        group = get_version('feed', 'group', 1)
+        bump_version('feed', 'group', 1)
+        self.assertEqual(get_version('feed'), feed)
+        self.assertNotEqual(get_version('feed', 'group', 1), group)
+
+
+class GetOrRecomputeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_fresh_value_is_not_recomputed(self):
+        compute = mock.Mock(return_value='value')
+        get_or_recompute('key', compute, 60)
+        self.assertEqual(get_or_recompute('key', compute, 60), 'value')
+        compute.assert_called_once()
+
+    def test_stale_value_served_while_locked(self):
+        cache.set('key', ('stale', 0.1, time.time() - 1), 60)
+        cache.add('key:lock', 1)
+        compute = mock.Mock(return_value='fresh')
+        self.assertEqual(get_or_recompute('key', compute, 60), 'stale')
+        compute.assert_not_called()
+
+    def test_missing_value_awaited_from_lock_holder(self):
+        cache.add('key:lock', 1)
+        holder = threading.Timer(
+            0.1, cache.set, ('key', ('fresh', 0.1, time.time() + 60), 60)
+        )
+        holder.start()
+        self.addCleanup(holder.join)
+        compute = mock.Mock(return_value='own')
+        self.assertEqual(get_or_recompute('key', compute, 60), 'fresh')
+        compute.assert_not_called()
+
+    @mock.patch('core.cache.LOCK_WAIT', 0.1)
+    def test_missing_value_computed_when_holder_is_slow(self):
+        cache.add('key:lock', 1)
+        compute = mock.Mock(return_value='own')
+        self.assertEqual(get_or_recompute('key', compute, 60), 'own')
+
+    def test_expired_value_recomputed_by_lock_holder(self):
+        cache.set('key', ('stale', 0.1, time.time() - 1), 60)
+        compute = mock.Mock(return_value='fresh')
+        self.assertEqual(get_or_recompute('key', compute, 60), 'fresh')
+        self.assertIsNone(cache.get('key:lock'))
+
+    def test_fragmentcache_tag(self):
+        template = Template(
+            '{% load fragment_cache %}'
+            '{% fragmentcache 60 fragment name %}{{ name }}'
+            '{% endfragmentcache %}'
+        )
+        self.assertEqual(template.render(Context({'name': 'a'})), 'a')
+        self.assertEqual(template.render(Context({'name': 'a'})), 'a')
+        self.assertEqual(template.render(Context({'name': 'b'})), 'b')
@@ -0,0 +1,111 @@
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.cache_backends import SQLiteCache
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SQLiteCache(
+            f'{self.directory}/cache.sqlite3', {'OPTIONS': options}
+        )
+
+    def test_entries_are_shared_between_instances(self):
+        self.cache.set('key', {'value': 1})
+        other = self.make_cache()
+        self.assertEqual(other.get('key'), {'value': 1})
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expired_entries_are_missing(self):
+        self.cache.set('key', 'value', 60)
+        with mock.patch('core.cache_backends.time.time',
+                        return_value=time.time() + 61):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertFalse(self.cache.has_key('key'))
+            self.assertTrue(self.cache.add('key', 'new'))
+        self.cache.set('gone', 'value', 0)
+        self.assertIsNone(self.cache.get('gone'))
+
+    def test_add_keeps_existing_value(self):
+        self.assertTrue(self.cache.add('key', 'first'))
+        self.assertFalse(self.cache.add('key', 'second'))
+        self.assertEqual(self.cache.get('key'), 'first')
+
+    def test_many(self):
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']),
+                         {'a': 1, 'b': 2})
+        self.cache.delete_many(['a', 'b'])
+        self.assertEqual(self.cache.get_many(['a', 'b']), {})
+
+    def test_incr_is_atomic(self):
+        self.cache.set('counter', 0)
+
+        def work():
+            cache = self.make_cache()
+            for _ in range(50):
+                cache.incr('counter')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_cull_evicts_least_recently_read(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        now = time.time()
+        for offset, key in enumerate(['old', 'read', 'new']):
+            with mock.patch('core.cache_backends.time.time',
+                            return_value=now + offset * 10):
+                cache.set(key, key)
+        with mock.patch('core.cache_backends.time.time',
+                        return_value=now + 30):
+            cache.get('read')
+            cache.get('old')
+        with mock.patch('core.cache_backends.time.time',
+                        return_value=now + 40):
+            cache.set('newest', 'newest')
+        self.assertEqual(
+            cache.get_many(['old', 'read', 'new', 'newest']),
+            {'old': 'old', 'read': 'read', 'newest': 'newest'}
+        )
+
+    def test_read_does_not_wait_for_writer(self):
+        with mock.patch('core.cache_backends.time.time',
+                        return_value=time.time() - 60):
+            self.cache.set('key', 'value')
+        writer = sqlite3.connect(f'{self.directory}/cache.sqlite3',
+                                 isolation_level=None)
+        self.addCleanup(writer.close)
+        writer.execute('BEGIN IMMEDIATE')
+        start = time.perf_counter()
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertLess(time.perf_counter() - start, 1)
+        writer.execute('ROLLBACK')
+        self.cache.set('other', 'value')
+        self.assertEqual(self.cache.get('other'), 'value')
+
+    def test_count_is_checked_every_few_writes(self):
+        cache = self.make_cache(MAX_ENTRIES=2)
+        with mock.patch.object(cache, '_cull_every', 5):
+            for number in range(4):
+                cache.set(number, number)
+            self.assertEqual(len(cache.get_many(range(4))), 4)
+            cache.set(4, 4)
+        self.assertLessEqual(len(cache.get_many(range(5))), 2)
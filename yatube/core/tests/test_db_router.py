@@ -0,0 +1,112 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import router
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings,
+)
+
+from core import db_router
+from core.cache import get_or_recompute
+from core.middleware import (
+    PIN_COOKIE, AnonymousPageCacheMiddleware, ReplicaPinningMiddleware,
+)
+from posts.models import Group, Post
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def test_reads_go_to_replica_writes_to_primary(self):
+        self.assertEqual(router.db_for_read(Post), 'replica1')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_pinned_reads_go_to_primary(self):
+        with db_router.primary():
+            self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_read(Post), 'replica1')
+
+    def test_cache_refill_reads_primary(self):
+        reads = []
+        get_or_recompute(
+            'router-test', lambda: reads.append(router.db_for_read(Post)), 60
+        )
+        self.assertEqual(reads, ['default'])
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(router.allow_migrate('replica1', 'posts'))
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_is_primary(self):
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+
+class TrackWritesTest(TestCase):
+    def test_only_executed_writes_are_tracked(self):
+        with db_router.track_writes() as wrote:
+            list(Group.objects.all())
+            router.db_for_write(Post)
+            self.assertFalse(wrote)
+            Group.objects.create(title='Группа', slug='group')
+        self.assertTrue(wrote)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_PIN_SECONDS=5)
+class ReplicaPinningMiddlewareTest(TransactionTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.reads = []
+
+    def view(self, write=False):
+        def get_response(request):
+            self.reads.append(router.db_for_read(Post))
+            if write:
+                Group.objects.create(title='Группа', slug='group')
+            return HttpResponse()
+        return ReplicaPinningMiddleware(get_response)
+
+    def test_get_reads_replica(self):
+        response = self.view()(self.factory.get('/'))
+        self.assertEqual(self.reads, ['replica1'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_following_reads(self):
+        response = self.view(write=True)(self.factory.post('/'))
+        self.assertEqual(self.reads, ['default'])
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = cookie.value
+        self.view()(request)
+        self.assertEqual(self.reads, ['default', 'default'])
+
+    def test_expired_pin_reads_replica(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = str(int(time.time()) - 1)
+        self.view()(request)
+        self.assertEqual(self.reads, ['replica1'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'],
+                   PAGE_CACHE_VIEWS=['posts:main'])
+class PageCacheRoutingTest(SimpleTestCase):
+    def test_page_cache_miss_reads_primary(self):
+        reads = []
+
+        def get_response(request):
+            middleware.process_view(request, None, (), {})
+            reads.append(router.db_for_read(Post))
+            return HttpResponse()
+
+        middleware = AnonymousPageCacheMiddleware(get_response)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.resolver_match = mock.Mock(view_name='posts:main')
+        with mock.patch('core.middleware.cache') as cache:
+            cache.get.return_value = None
+            middleware(request)
+        self.assertEqual(reads, ['default'])
+        self.assertEqual(router.db_for_read(Post), 'replica1')
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import (
+    CACHE_REQUESTS, REGISTRY, REQUEST_DURATION, REQUESTS, Counter, Histogram
+)
+from posts.models import Post, User
+
+
+class MetricTypesTest(TestCase):
+    def test_counter_exposition(self):
+        counter = Counter('test_total', 'Тест.', ('view',))
+        counter.inc('posts:main')
+        counter.inc('posts:main', amount=2)
+        self.assertEqual(counter.expose()[-1],
+                         'test_total{view="posts:main"} 3')
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('test_seconds', 'Тест.', buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        self.assertEqual(histogram.expose()[2:], [
+            'test_seconds_bucket{le="0.1"} 1',
+            'test_seconds_bucket{le="1"} 2',
+            'test_seconds_bucket{le="+Inf"} 3',
+            'test_seconds_sum 5.55',
+            'test_seconds_count 3',
+        ])
+
+    def test_snapshots_are_summed(self):
+        histogram = Histogram('test_seconds', 'Тест.', buckets=(0.1, 1))
+        histogram.observe(0.05)
+        other = histogram.empty_copy()
+        other.observe(0.5)
+        histogram.merge(json.loads(json.dumps(other.snapshot())))
+        self.assertEqual(histogram.count(), 2)
+        self.assertEqual(histogram.expose()[3],
+                         'test_seconds_bucket{le="1"} 2')
+
+
+class MetricsEndpointTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='test')
+        Post.objects.create(text='test text', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        REGISTRY.clear()
+
+    def test_requests_are_counted_by_view_name(self):
+        self.client.get(reverse('posts:main'))
+        self.client.get(reverse('posts:main'))
+        self.client.get('/no-such-page/')
+        self.assertEqual(REQUESTS.value('posts:main', 200), 2)
+        self.assertEqual(REQUESTS.value('unresolved', 404), 1)
+        self.assertEqual(REQUEST_DURATION.count('posts:main'), 2)
+        self.assertEqual(CACHE_REQUESTS.value('page', 'hit'), 1)
+
+    def test_exposition_endpoint(self):
+        self.client.get(reverse('posts:profile', args=('test',)))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, 'yatube_requests_total{view="posts:profile",'
+                      'status="200"} 1'
+        )
+        self.assertContains(response, '# TYPE yatube_request_queries '
+                                      'histogram')
+        self.assertContains(
+            response, 'yatube_cache_requests_total{cache="fragment",'
+                      'result="miss"}'
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_endpoint_is_restricted(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+
+
+class MultiprocessMetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        REGISTRY.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_endpoint_sums_all_workers(self):
+        with open(os.path.join(self.directory, '1-other.json'), 'w') as file:
+            json.dump({'yatube_requests_total': [
+                [['posts:main', '200'], 5]
+            ]}, file)
+        with override_settings(METRICS_DIR=self.directory):
+            self.client.get(reverse('posts:main'))
+            response = self.client.get(reverse('metrics'))
+        self.assertContains(
+            response, 'yatube_requests_total{view="posts:main",'
+                      'status="200"} 6'
+        )
+        self.assertEqual(REQUESTS.value('posts:main', 200), 1)
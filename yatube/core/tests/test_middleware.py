@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test')
+        cls.post = Post.objects.create(text='test text', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.id})
+
+    def test_anonymous_page_served_from_cache(self):
+        self.guest_client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(self.url)
+        self.assertContains(response, 'test text')
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_cache_dropped_on_post_change(self):
+        self.guest_client.get(self.url)
+        Post.objects.filter(id=self.post.id).update(text='edited text')
+        self.assertNotContains(self.guest_client.get(self.url), 'edited')
+        post = Post.objects.get(id=self.post.id)
+        post.save()
+        self.assertContains(self.guest_client.get(self.url), 'edited text')
+
+    def test_authorized_user_bypasses_cache(self):
+        self.guest_client.get(self.url)
+        Post.objects.filter(id=self.post.id).update(text='edited text')
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'edited text')
+
+    @override_settings(PAGE_CACHE_VIEWS=['users:signup'])
+    def test_page_with_csrf_token_is_not_cached(self):
+        url = reverse('users:signup')
+        for client in (Client(), Client()):
+            response = client.get(url)
+            self.assertContains(response, 'csrfmiddlewaretoken')
+            self.assertIn('csrftoken', response.cookies)
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.db import connection
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.nplusone import NPlusOneDetector, NPlusOneError, query_shape
+from posts.models import Post, User
+
+
+class NPlusOneDetectorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            user = User.objects.create_user(username=f'user{i}')
+            Post.objects.create(text=f'post {i}', author=user)
+
+    def test_in_lists_share_shape(self):
+        self.assertEqual(query_shape('WHERE id IN (%s, %s)'),
+                         query_shape('WHERE id IN (%s)'))
+
+    def test_lazy_access_in_template_is_reported(self):
+        template = engines['django'].from_string(
+            '{% for post in posts %}\n{{ post.author.username }}\n'
+            '{% endfor %}'
+        )
+        detector = NPlusOneDetector(threshold=3, ignore=[])
+        with connection.execute_wrapper(detector):
+            template.render({'posts': Post.objects.all()})
+        [(shape, count, origins)] = detector.problems()
+        self.assertIn('"auth_user"', shape)
+        self.assertEqual(count, 3)
+        self.assertEqual(origins, ['<unknown source>:2'])
+
+    def test_select_related_is_clean(self):
+        detector = NPlusOneDetector(threshold=3, ignore=[])
+        with connection.execute_wrapper(detector):
+            for post in Post.objects.select_related('author'):
+                post.author.username
+        self.assertEqual(detector.problems(), [])
+
+    @override_settings(NPLUSONE_MODE='raise')
+    def test_views_are_checked(self):
+        cache.clear()
+        response = self.client.get(reverse('posts:main'))
+        self.assertEqual(response.status_code, 200)
+        cache.clear()
+        with self.assertRaises(NPlusOneError) as error:
+            with self.settings(NPLUSONE_THRESHOLD=1):
+                self.client.get(reverse('posts:main'))
+        # Paginator срезает страницу по числу постов: [:3]
+        shape, _ = Post.objects.select_related(
+            'author', 'group'
+        )[:3].query.sql_with_params()
+        self.assertIn(f'  1x {shape}\n    at posts/index.html:12',
+                      str(error.exception))
+
+    def test_zero_threshold_is_kept(self):
+        self.assertEqual(NPlusOneDetector(threshold=0).threshold, 0)
@@ -0,0 +1,27 @@
+from django.test import TestCase
+
+from core.paginator import EstimatedCountPaginator
+from posts.models import Post, User
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='test')
+        posts = [
+            Post.objects.create(text=f'post {i}', author=user)
+            for i in range(5)
+        ]
+        posts[0].delete()
+        cls.last_pk = posts[-1].pk
+
+    def test_unfiltered_count_is_estimated_from_max_pk(self):
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, self.last_pk)
+
+    def test_filtered_count_is_exact(self):
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(text__startswith='post'), 2
+        )
+        self.assertEqual(paginator.count, 4)
@@ -0,0 +1,58 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.profiling import RequestProfile
+from posts.models import Post, User
+
+
+@override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0)
+class RequestProfilingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='test')
+        cls.post = Post.objects.create(text='test text', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:post_detail', args=(self.post.pk,))
+
+    def get_report(self, url):
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            response = self.client.get(url)
+        return response, json.loads(logs.records[-1].getMessage())
+
+    def test_server_timing_and_log(self):
+        response, report = self.get_report(self.url)
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        self.assertEqual(report['view'], 'posts:post_detail')
+        self.assertGreater(report['queries'], 0)
+        self.assertGreater(report['template_ms'], 0)
+
+    def test_page_cache_hits_are_counted(self):
+        _, first = self.get_report(self.url)
+        _, second = self.get_report(self.url)
+        self.assertGreaterEqual(first['cache_misses'], 1)
+        self.assertEqual(second['cache_hits'], 1)
+        self.assertEqual(second['queries'], 0)
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_profiled(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+
+
+class RequestProfileTest(TestCase):
+    def test_duplicate_queries(self):
+        profile = RequestProfile()
+        with connection.execute_wrapper(profile.execute):
+            list(User.objects.filter(pk=1))
+            list(User.objects.filter(pk=1))
+            list(User.objects.filter(pk=2))
+        self.assertEqual(profile.query_count, 3)
+        self.assertEqual(profile.duplicate_count, 1)
+        self.assertEqual(profile.top_duplicates()[0]['count'], 2)
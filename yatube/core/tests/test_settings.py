@@ -0,0 +1,55 @@
+import importlib
+import os
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from yatube.settings import base
+
+
+def load_prod(**environ):
+    with mock.patch.dict(os.environ, environ):
+        module = importlib.import_module('yatube.settings.prod')
+        return importlib.reload(module)
+
+
+class CacheSettingsTest(SimpleTestCase):
+    def test_default_backend(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('DJANGO_CACHE_BACKEND', None)
+            caches = base.cache_settings('file')
+        self.assertEqual(
+            caches['default']['BACKEND'],
+            'django.core.cache.backends.filebased.FileBasedCache'
+        )
+
+    def test_backend_from_environment(self):
+        with mock.patch.dict(os.environ, DJANGO_CACHE_BACKEND='shm',
+                             DJANGO_CACHE_LOCATION='/dev/shm/test'):
+            caches = base.cache_settings('file')
+        self.assertEqual(caches['default']['LOCATION'], '/dev/shm/test')
+
+    def test_unknown_backend(self):
+        with mock.patch.dict(os.environ, DJANGO_CACHE_BACKEND='redis'):
+            with self.assertRaises(ImproperlyConfigured):
+                base.cache_settings('file')
+
+
+class ProdSettingsTest(SimpleTestCase):
+    def test_secret_key_is_required(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('DJANGO_SECRET_KEY', None)
+            with self.assertRaises(ImproperlyConfigured):
+                load_prod()
+
+    def test_production_defaults(self):
+        prod = load_prod(DJANGO_SECRET_KEY='secret',
+                         DJANGO_ALLOWED_HOSTS='yatube.ru, www.yatube.ru')
+        self.assertFalse(prod.DEBUG)
+        self.assertEqual(prod.ALLOWED_HOSTS, ['yatube.ru', 'www.yatube.ru'])
+        self.assertEqual(prod.TEMPLATES[0]['OPTIONS']['loaders'][0][0],
+                         'django.template.loaders.cached.Loader')
+        self.assertTrue(base.TEMPLATES[0]['APP_DIRS'])
+        self.assertEqual(prod.CACHES['default']['BACKEND'],
+                         'core.cache_backends.SQLiteCache')
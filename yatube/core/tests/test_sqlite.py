@@ -0,0 +1,29 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+
+class SQLitePragmasTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_connection(self):
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('cache_size'), -64000)
+
+
+class BenchmarkSQLiteTest(TestCase):
+    def test_reports_both_profiles(self):
+        out = StringIO()
+        call_command('benchmark_sqlite', '--duration', '0.2',
+                     '--posts', '100', stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report), {'default', 'tuned'})
+        self.assertGreater(report['tuned']['reads_per_second'], 0)
+        self.assertGreater(report['tuned']['writes_per_second'], 0)
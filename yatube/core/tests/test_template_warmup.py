@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from core import template_warmup
+
+
+def templates(directories, cached=True):
+    loaders = ['django.template.loaders.filesystem.Loader']
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    template = dict(settings.TEMPLATES[0], DIRS=directories, APP_DIRS=False)
+    template['OPTIONS'] = dict(template['OPTIONS'], loaders=loaders)
+    return [template]
+
+
+class TemplateWarmupTest(SimpleTestCase):
+    def test_project_templates_are_listed(self):
+        names = template_warmup.template_names()
+        self.assertIn('base.html', names)
+        self.assertIn('includes/paginator.html', names)
+
+    @override_settings(
+        TEMPLATES=templates([settings.TEMPLATES_DIR], cached=False)
+    )
+    def test_warm_without_cached_loader_does_nothing(self):
+        self.assertEqual(template_warmup.warm(), [])
+
+    @override_settings(TEMPLATES=templates([settings.TEMPLATES_DIR]))
+    def test_warm_fills_loader_cache(self):
+        results = template_warmup.warm()
+        self.assertIn('posts/index.html', [name for name, *_ in results])
+        self.assertEqual([error for *_, error in results if error], [])
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('includes/header.html', [
+            template.origin.template_name
+            for template in loader.get_template_cache.values()
+        ])
+
+    def test_command_reports_compile_time(self):
+        stdout = StringIO()
+        call_command('warm_templates', stdout=stdout, stderr=StringIO())
+        self.assertIn('posts/index.html', stdout.getvalue())
+        self.assertIn('всего, шаблонов:', stdout.getvalue())
+
+    def test_command_fails_on_broken_template(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(f'{directory}/broken.html', 'w') as file:
+            file.write('{% if %}')
+        with override_settings(TEMPLATES=templates([directory])):
+            with self.assertRaises(CommandError):
+                call_command('warm_templates', stdout=StringIO(),
+                             stderr=StringIO())
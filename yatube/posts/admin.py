@@ -1,6 +1,8 @@
 from django.contrib import admin
 
+from core.paginator import EstimatedCountPaginator
 from posts.models import Post, Group, Comment, Follow
+from posts.search import get_backend
 
 
 @admin.register(Post)
@@ -12,12 +14,26 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('created',)
+    date_hierarchy = 'created'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return get_backend().filter(queryset, search_term), False
+
+
+@admin.register(Group)
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+
 
-admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Follow)
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register()
+def check_thumbnail_executor(app_configs, **kwargs):
+    # дочерний процесс сдвигает версии в своей копии locmem, и веб-воркеры
+    # так и не узнают о готовых миниатюрах
+    if (
+        settings.POST_THUMBNAIL_EXECUTOR == 'process'
+        and settings.CACHES['default']['BACKEND'] == LOCMEM
+    ):
+        return [Error(
+            "POST_THUMBNAIL_EXECUTOR='process' требует кеша, общего для "
+            'процессов: LocMemCache у каждого процесса свой.',
+            hint='Выберите DJANGO_CACHE_BACKEND=sqlite или file, либо '
+                 "POST_THUMBNAIL_EXECUTOR='thread'.",
+            id='posts.E001',
+        )]
+    return []
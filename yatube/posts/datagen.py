@@ -0,0 +1,166 @@
+"""Синтетические данные для нагрузочных замеров.
+
+Авторы распределены по закону Ципфа: немногие пишут большую часть
+постов и собирают большую часть подписчиков, как на живом сайте.
+Всё вставляется пачками bulk_create, производные данные (счётчики,
+ленты, поиск) пересчитываются один раз в конце.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from faker import Faker
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.transfer import keep_created, rebuild_derived
+
+SIZES = {
+    'small': {'users': 200, 'groups': 10, 'posts': 2000,
+              'follows': 10, 'comments': 4000},
+    'medium': {'users': 2000, 'groups': 50, 'posts': 50000,
+               'follows': 30, 'comments': 100000},
+    'large': {'users': 20000, 'groups': 200, 'posts': 1000000,
+              'follows': 50, 'comments': 2000000},
+}
+ZIPF_EXPONENT = 1.1
+SENTENCE_POOL = 500
+DAYS = 365
+
+
+def zipf_weights(count, exponent=ZIPF_EXPONENT):
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, count + 1)))
+
+
+def bulk_insert(model, objects, batch_size):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class DataGenerator:
+    def __init__(self, users, groups, posts, follows, comments,
+                 seed=0, batch_size=1000, prefix='user'):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.follows = follows
+        self.comments = comments
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.random = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.sentences = [
+            self.faker.paragraph(nb_sentences=3)
+            for _ in range(SENTENCE_POOL)
+        ]
+        self.now = timezone.now()
+
+    def text(self):
+        return self.random.choice(self.sentences)
+
+    def created(self):
+        return self.now - timedelta(seconds=self.random.randrange(
+            DAYS * 24 * 60 * 60
+        ))
+
+    def make_users(self):
+        password = make_password(None)
+        usernames = [f'{self.prefix}{i}' for i in range(self.users)]
+        bulk_insert(User, (
+            User(username=name, password=password,
+                 first_name=self.faker.first_name(),
+                 last_name=self.faker.last_name())
+            for name in usernames
+        ), self.batch_size)
+        ids = dict(User.objects.filter(
+            username__startswith=self.prefix
+        ).values_list('username', 'id'))
+        # порядок задаёт популярность: первые авторы — самые активные
+        return [ids[name] for name in usernames if name in ids]
+
+    def make_groups(self):
+        bulk_insert(Group, (
+            Group(title=self.faker.catch_phrase()[:200],
+                  slug=f'{self.prefix}-group-{i}',
+                  description=self.text())
+            for i in range(self.groups)
+        ), self.batch_size)
+        return list(Group.objects.filter(
+            slug__startswith=f'{self.prefix}-group-'
+        ).values_list('id', flat=True))
+
+    def make_posts(self, user_ids, group_ids):
+        weights = zipf_weights(len(user_ids))
+        group_choices = group_ids + [None] * len(group_ids)
+
+        def posts():
+            for _ in range(self.posts):
+                yield Post(
+                    author_id=self.random.choices(
+                        user_ids, cum_weights=weights
+                    )[0],
+                    group_id=self.random.choice(group_choices),
+                    text=self.text(),
+                    created=self.created(),
+                )
+
+        with keep_created(Post):
+            bulk_insert(Post, posts(), self.batch_size)
+
+    def make_follows(self, user_ids):
+        weights = zipf_weights(len(user_ids))
+        count = min(self.follows, len(user_ids) - 1)
+
+        def follows():
+            for user_id in user_ids:
+                authors = set(self.random.choices(
+                    user_ids, cum_weights=weights, k=count
+                ))
+                authors.discard(user_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        bulk_insert(Follow, follows(), self.batch_size)
+
+    def make_comments(self, user_ids):
+        post_ids = list(Post.objects.filter(
+            author__username__startswith=self.prefix
+        ).values_list('id', flat=True))
+        if not post_ids:
+            return
+        weights = zipf_weights(len(post_ids))
+
+        def comments():
+            for _ in range(self.comments):
+                yield Comment(
+                    post_id=self.random.choices(
+                        post_ids, cum_weights=weights
+                    )[0],
+                    author_id=self.random.choice(user_ids),
+                    text=self.text()[:200],
+                    created=self.created(),
+                )
+
+        with keep_created(Comment):
+            bulk_insert(Comment, comments(), self.batch_size)
+
+    def run(self, progress=lambda step: None):
+        progress('users')
+        user_ids = self.make_users()
+        progress('groups')
+        group_ids = self.make_groups()
+        progress('posts')
+        self.make_posts(user_ids, group_ids)
+        progress('follows')
+        self.make_follows(user_ids)
+        progress('comments')
+        self.make_comments(user_ids)
+        progress('derived')
+        rebuild_derived()
@@ -0,0 +1,145 @@
+"""Лента подписок с рассылкой постов при записи.
+
+Новый пост сразу раскладывается по лентам подписчиков автора, поэтому
+чтение ленты — один диапазонный проход по индексу (user, created).
+Авторов с огромным числом подписчиков не рассылаем: их посты
+подтягиваются в ленту читателя при её открытии. Когда такой автор
+теряет подписчиков и снова рассылается, ленты его подписчиков
+дополняются постами, написанными за это время. Обратный переход
+ничего не теряет: до него рассылка заполнила ленты, а подтягивание
+продолжает с последней записи.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Max
+
+from posts.models import AuthorStats, Follow, Post, TimelineEntry
+
+BATCH_SIZE = 500
+TIMELINE_ORDERING = ('-created', '-post_id')
+
+
+def feed_scopes(author_id, group_id):
+    """Области версий кеша, которые затрагивает пост."""
+    yield ('feed',)
+    if author_id is not None:
+        yield ('feed', 'author', author_id)
+    if group_id is not None:
+        yield ('feed', 'group', group_id)
+
+
+def _bulk_insert(entries):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _entries(user_id, posts):
+    for post_id, author_id, created in posts.values_list(
+        'id', 'author_id', 'created'
+    ).iterator():
+        yield TimelineEntry(user_id=user_id, post_id=post_id,
+                            author_id=author_id, created=created)
+
+
+def is_celebrity(author_id):
+    return AuthorStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.FOLLOW_FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if post.author_id is None or is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post.id,
+                      author_id=post.author_id, created=post.created)
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту новые подписки уже написанные посты автора."""
+    if is_celebrity(author_id):
+        return
+    _bulk_insert(_entries(user_id, Post.objects.filter(author_id=author_id)))
+
+
+def dropped_below_fanout(author_id):
+    """True, если отписка только что опустила автора до порога рассылки.
+
+    Вызывается в транзакции после уменьшения счётчика: строка
+    статистики заблокирована, и переход видит ровно одна отписка.
+    """
+    count = AuthorStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    return count == settings.FOLLOW_FEED_FANOUT_LIMIT
+
+
+def backfill_followers(author_id):
+    """Дополняет ленты всех подписчиков автора его постами."""
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    for user_id in followers.iterator():
+        backfill(user_id, author_id)
+
+
+def rebuild_timelines():
+    """Дополняет ленты всех подписок, например после импорта."""
+    pairs = Follow.objects.values_list('user_id', 'author_id')
+    for user_id, author_id in pairs.iterator():
+        backfill(user_id, author_id)
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def pull_celebrities(user):
+    """Подтягивает в ленту свежие посты нерассылаемых авторов.
+
+    Первое подтягивание берёт не больше FOLLOW_FEED_PULL_LIMIT последних
+    постов автора: иначе оно копировало бы в ленту всё, что автор
+    когда-либо написал. Дальше берутся все посты новее уже подтянутых,
+    сколько бы их ни набралось между визитами.
+    """
+    celebrities = list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.FOLLOW_FEED_FANOUT_LIMIT
+    ).values_list('author', flat=True))
+    if not celebrities:
+        return
+    latest = dict(
+        TimelineEntry.objects.filter(
+            user=user, author__in=celebrities
+        ).values('author').annotate(
+            latest=Max('created')
+        ).values_list('author', 'latest')
+    )
+    for author_id in celebrities:
+        posts = Post.objects.filter(author_id=author_id)
+        if author_id in latest:
+            posts = posts.filter(created__gte=latest[author_id])
+        else:
+            posts = posts.order_by('-created', '-id')[
+                :settings.FOLLOW_FEED_PULL_LIMIT
+            ]
+        _bulk_insert(_entries(user.id, posts))
+
+
+def timeline(user):
+    pull_celebrities(user)
+    return TimelineEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    )
@@ -0,0 +1,149 @@
+import json
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.metrics import percentile
+from posts.datagen import SIZES, DataGenerator
+from posts.models import AuthorStats, Comment, GroupStats, Post, User
+
+# Без кеша замер видит запросы и отрисовку представлений, а не попадания
+# в кеш страниц и фрагментов.
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def scenarios():
+    """(имя, адрес, нужен ли вход) для каждого представления posts."""
+    post = Post.objects.order_by('-created', '-id').first()
+    if post is None:
+        raise CommandError('В базе нет постов: запустите generate_data.')
+    author = AuthorStats.objects.order_by('-posts_count').first().user
+    reader = AuthorStats.objects.order_by('-following_count').first().user
+    group_stats = GroupStats.objects.order_by('-posts_count').first()
+    commented = Comment.objects.values('post').annotate(
+        total=Count('id')
+    ).order_by('-total').values_list('post', flat=True).first() or post.pk
+    pages = math.ceil(Post.objects.count() / settings.POSTS_ON_PAGE)
+    word = max(post.text.split(), key=len).strip('.,!?')
+    yield 'index', reverse('posts:main'), None
+    yield 'index_deep', (
+        f"{reverse('posts:main')}?page={max(pages // 2, 1)}"
+    ), None
+    if group_stats is not None:
+        yield 'group_list', reverse(
+            'posts:group_list', args=(group_stats.group.slug,)
+        ), None
+    yield 'profile', reverse('posts:profile', args=(author.username,)), None
+    yield 'post_detail', reverse('posts:post_detail', args=(commented,)), None
+    yield 'comment_list', reverse(
+        'posts:comment_list', args=(commented,)
+    ), None
+    yield 'search', f"{reverse('posts:search')}?q={word}", None
+    yield 'follow_index', reverse('posts:follow_index'), reader
+    yield 'post_create', reverse('posts:post_create'), author
+    yield 'post_edit', reverse('posts:post_edit', args=(post.pk,)), (
+        post.author
+    )
+
+
+class Command(BaseCommand):
+    help = ('Замеряет представления posts через тестовый Client и выводит '
+            'p50/p95 времени ответа и число запросов в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', choices=SIZES,
+            help='Замер на временной базе с данными этого размера; '
+                 'без флага — на текущей базе.'
+        )
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--cache', choices=('off', 'cold', 'warm'), default='off',
+            help='off — кеш отключён (по умолчанию); cold — кеш очищается '
+                 'перед каждым запросом; warm — ответы из прогретого кеша.'
+        )
+        parser.add_argument('--output', help='Файл для JSON-отчёта.')
+
+    def handle(self, *args, **options):
+        old_name = None
+        if options['size']:
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+        try:
+            if options['size']:
+                self.stderr.write(f"Генерация данных {options['size']}…")
+                DataGenerator(**SIZES[options['size']]).run()
+            if options['cache'] == 'off':
+                with override_settings(CACHES=NO_CACHE):
+                    report = self.benchmark(options)
+            else:
+                report = self.benchmark(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def benchmark(self, options):
+        cache.clear()
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else (
+            'localhost'
+        )
+        report = {
+            'size': options['size'],
+            'rows': {
+                'users': User.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+            'iterations': options['iterations'],
+            'cache': options['cache'],
+            'views': {},
+        }
+        for name, url, user in list(scenarios()):
+            client = Client(HTTP_HOST=host)
+            if user is not None:
+                client.force_login(user)
+            for _ in range(options['warmup']):
+                client.get(url)
+            timings = []
+            queries = []
+            status = None
+            for _ in range(options['iterations']):
+                if options['cache'] == 'cold':
+                    cache.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries.append(len(captured))
+                status = response.status_code
+            report['views'][name] = {
+                'url': url,
+                'status': status,
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+                'max_ms': round(max(timings), 2),
+                'queries': max(queries),
+            }
+            self.stderr.write(
+                f"{name}: p50 {report['views'][name]['p50_ms']} ms, "
+                f"{report['views'][name]['queries']} запросов"
+            )
+        return report
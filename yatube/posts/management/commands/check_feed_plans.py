@@ -0,0 +1,73 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts.feed import TIMELINE_ORDERING
+from posts.models import Comment, Post, TimelineEntry
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\S+( AS \S+)?$')
+TEMP_SORT = 'USE TEMP B-TREE'
+POST_ORDERINGS = (Post._meta.ordering, ('-created', '-id'))
+
+
+def feed_queries():
+    """Запросы лент в том виде, в каком их строят представления."""
+    for ordering in POST_ORDERINGS:
+        suffix = ', '.join(ordering)
+        yield f'index ({suffix})', Post.objects.select_related(
+            'author', 'group'
+        ).order_by(*ordering)
+        yield f'group_posts ({suffix})', Post.objects.filter(
+            group_id=1
+        ).select_related('author').order_by(*ordering)
+        yield f'profile ({suffix})', Post.objects.filter(
+            author_id=1
+        ).select_related('group').order_by(*ordering)
+    yield 'follow_index', TimelineEntry.objects.filter(
+        user_id=1
+    ).select_related('post__author', 'post__group').order_by(
+        *TIMELINE_ORDERING
+    )
+    yield 'post_detail comments', Comment.objects.filter(
+        post_id=1
+    ).select_related('author').order_by('created', 'id')
+
+
+def plan_problems(plan):
+    return [
+        line for line in plan
+        if FULL_SCAN.match(line) or TEMP_SORT in line
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Проверяет планы запросов лент через EXPLAIN QUERY PLAN: '
+            'без полного сканирования таблиц и сортировки во временном '
+            'B-дереве.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'EXPLAIN QUERY PLAN поддерживается только для SQLite.'
+            )
+        failed = []
+        for name, queryset in feed_queries():
+            queryset = queryset[:settings.POSTS_ON_PAGE]
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            problems = plan_problems(plan)
+            status = 'FAIL' if problems else 'OK'
+            self.stdout.write(f'[{status}] {name}')
+            for line in plan:
+                self.stdout.write(f'    {line}')
+            if problems:
+                failed.append(name)
+        if failed:
+            raise CommandError(
+                'Запросы без подходящего индекса: ' + ', '.join(failed)
+            )
+        self.stdout.write(self.style.SUCCESS('Все ленты используют индексы.'))
@@ -0,0 +1,41 @@
+import gzip
+import sys
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import export_records
+
+
+def open_output(path):
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = ('Выгружает группы, посты, комментарии и подписки в NDJSON '
+            '(файлы картинок копируются отдельно вместе с MEDIA_ROOT).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл для выгрузки, .gz сжимается; «-» — stdout.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        counts = Counter()
+        output = open_output(options['path'])
+        try:
+            for label, line in export_records(options['chunk_size']):
+                output.write(line + '\n')
+                counts[label] += 1
+                if counts[label] % options['chunk_size'] == 0:
+                    self.stderr.write(f'{label}: {counts[label]}', ending='\r')
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        for label, count in counts.items():
+            self.stderr.write(f'{label}: {count}')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts.datagen import SIZES, DataGenerator
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу синтетическими пользователями, группами, '
+            'постами, подписками и комментариями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=SIZES, default='small')
+        for name in SIZES['small']:
+            parser.add_argument(f'--{name}', type=int,
+                                help='Переопределяет значение из --size.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--prefix', default='user',
+                            help='Префикс имён пользователей и групп.')
+
+    def handle(self, *args, **options):
+        sizes = dict(SIZES[options['size']])
+        for name in sizes:
+            if options[name] is not None:
+                sizes[name] = options[name]
+        DataGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            prefix=options['prefix'],
+            **sizes
+        ).run(lambda step: self.stderr.write(f'{step}…'))
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{name}: {value}' for name, value in sizes.items()
+        )))
@@ -0,0 +1,47 @@
+import gzip
+import sys
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import import_records, read_records, rebuild_derived
+
+
+def open_input(path):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = ('Загружает NDJSON из export_posts пачками bulk_create, затем '
+            'пересчитывает счётчики, ленты подписок и поисковый индекс.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл выгрузки, .gz распаковывается; «-» — stdin.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        counts = Counter()
+        source = open_input(options['path'])
+        try:
+            for label, size in import_records(
+                read_records(source), options['batch_size']
+            ):
+                counts[label] += size
+                self.stderr.write(f'{label}: {counts[label]}', ending='\r')
+        except ValueError as error:
+            raise CommandError(error)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        self.stderr.write('')
+        self.stderr.write('Пересчёт счётчиков, лент и индекса поиска…')
+        rebuild_derived()
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{label}: {count}' for label, count in counts.items()
+        ) or 'Нет записей.'))
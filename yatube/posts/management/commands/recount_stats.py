@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.stats import recount_authors, recount_groups
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики авторов и групп по данным таблиц.'
+
+    def handle(self, *args, **options):
+        authors = recount_authors()
+        groups = recount_groups()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано авторов: {authors}, групп: {groups}.'
+        ))
@@ -1,7 +1,10 @@
+import json
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
 from core.models import CreatedModel
+from core.storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -46,18 +49,63 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    image_variants = models.TextField(
+        'Варианты картинки',
+        blank=True,
+        editable=False,
+        help_text='JSON с уменьшенными копиями картинки для srcset'
+    )
 
     class Meta:
         ordering = ['-created']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         default_related_name = 'posts'
+        indexes = [
+            models.Index(name='post_created', fields=['created']),
+            models.Index(name='post_group_created',
+                         fields=['group', 'created']),
+            models.Index(name='post_author_created',
+                         fields=['author', 'created']),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def get_image_variants(self):
+        """Варианты текущей картинки или пустой словарь, если их нет."""
+        try:
+            variants = json.loads(self.image_variants)
+        except ValueError:
+            return {}
+        if not isinstance(variants, dict) or (
+            variants.get('source') != self.image.name
+        ):
+            return {}
+        return variants
+
+    @property
+    def image_srcset(self):
+        """Адреса вариантов картинки для <picture> или None."""
+        variants = self.image and self.get_image_variants()
+        if not variants:
+            return None
+        storage = self.image.storage
+
+        def srcset(sizes):
+            return ', '.join(
+                f'{storage.url(name)} {width}w' for width, name in sizes
+            )
+
+        return {
+            'src': storage.url(variants['src']),
+            'srcset': srcset(variants['fallback']),
+            'webp_srcset': srcset(variants['webp']),
+        }
+
 
 class Comment(CreatedModel):
     post = models.ForeignKey(
@@ -77,6 +125,10 @@ class Comment(CreatedModel):
 
     class Meta:
         default_related_name = 'comments'
+        indexes = [
+            models.Index(name='comment_post_created',
+                         fields=['post', 'created']),
+        ]
 
 
 class Follow(models.Model):
@@ -102,3 +154,87 @@ class Follow(models.Model):
                 fields=['user', 'author']
             )
         ]
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: пост, разосланный подписчику."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    created = models.DateTimeField('Дата создания поста')
+
+    class Meta:
+        ordering = ['-created', '-post_id']
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        indexes = [
+            models.Index(
+                name='timeline_user_created',
+                fields=['user', 'created', 'post']
+            ),
+            models.Index(
+                name='timeline_user_author',
+                fields=['user', 'author']
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_timeline_entry',
+                fields=['user', 'post']
+            )
+        ]
+
+
+class AuthorStats(models.Model):
+    """Счётчики автора, поддерживаемые сигналами вместо COUNT(*)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+    def __str__(self):
+        return str(self.group)
@@ -0,0 +1,161 @@
+"""Полнотекстовый поиск по постам.
+
+Бэкенд выбирается настройкой POSTS_SEARCH_BACKEND, а если она не
+задана — по СУБД: таблицу FTS5 миграция создаёт только на SQLite, на
+остальных базах работает поиск через LIKE. На SQLite индекс лежит в
+виртуальной таблице FTS5 рядом с постами и обновляется сигналами
+сохранения и удаления поста; выдача сортируется по BM25.
+"""
+import re
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from posts.models import Post
+
+FTS_TABLE = 'posts_post_fts'
+TOKEN = re.compile(r'\w+')
+
+
+def get_backend():
+    if settings.POSTS_SEARCH_BACKEND:
+        return import_string(settings.POSTS_SEARCH_BACKEND)()
+    if connections[DEFAULT_DB_ALIAS].vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return DatabaseSearchBackend()
+
+
+def terms(query):
+    return TOKEN.findall(query)[:settings.POSTS_SEARCH_MAX_TERMS]
+
+
+def with_posts(ids):
+    """Посты в порядке ids, с авторами и группами за один запрос."""
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
+
+
+class SearchResults(Sequence):
+    """Ленивая выдача для Paginator: COUNT и срез — отдельные запросы."""
+
+    def __init__(self, count, fetch):
+        self._count = count
+        self._fetch = fetch
+
+    def count(self):
+        return self._count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start = index.start or 0
+            return self._fetch(start, index.stop - start)
+        return self._fetch(index, 1)[0]
+
+
+class DatabaseSearchBackend:
+    """Поиск через LIKE для баз без полнотекстового индекса."""
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def filter(self, queryset, query):
+        condition = Q()
+        for term in terms(query):
+            condition &= Q(text__icontains=term)
+        if not condition:
+            return queryset.none()
+        return queryset.filter(condition)
+
+    def search(self, query):
+        return self.filter(
+            Post.objects.select_related('author', 'group'), query
+        )
+
+
+class SQLiteFTSBackend:
+    """Индекс FTS5 с ранжированием BM25."""
+
+    def _cursor(self, write=False):
+        route = router.db_for_write if write else router.db_for_read
+        return connections[route(Post)].cursor()
+
+    def index(self, post):
+        with self._cursor(write=True) as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                [post.pk, post.text]
+            )
+
+    def remove(self, post_id):
+        with self._cursor(write=True) as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def rebuild(self):
+        with self._cursor(write=True) as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                f'SELECT id, text FROM {Post._meta.db_table}'
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+            )
+            cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+            return cursor.fetchone()[0]
+
+    def match(self, query):
+        # каждое слово в кавычках: операторы FTS5 из запроса не работают
+        return ' '.join(f'"{term}"' for term in terms(query))
+
+    def filter(self, queryset, query):
+        """Сужает queryset постов до совпадений, не меняя сортировку."""
+        match = self.match(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [match]
+        ))
+
+    def search(self, query):
+        match = self.match(query)
+        if not match:
+            return []
+
+        def count():
+            with self._cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                    f'WHERE {FTS_TABLE} MATCH %s', [match]
+                )
+                return cursor.fetchone()[0]
+
+        def fetch(offset, limit):
+            with self._cursor() as cursor:
+                cursor.execute(
+                    f'SELECT rowid FROM {FTS_TABLE} '
+                    f'WHERE {FTS_TABLE} MATCH %s '
+                    f'ORDER BY rank LIMIT %s OFFSET %s',
+                    [match, limit, offset]
+                )
+                return with_posts([row[0] for row in cursor.fetchall()])
+
+        return SearchResults(count, fetch)
@@ -0,0 +1,165 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.cache import bump_version
+from posts import feed, search, stats, thumbnails
+from posts.models import (
+    AuthorStats, Comment, Follow, Group, GroupStats, Post, User
+)
+
+# поля пользователя, которые видны в лентах; вход (last_login) их не меняет
+AUTHOR_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_owner(sender, instance, **kwargs):
+    instance._saved_owner = (
+        instance.__dict__.get('author_id'),
+        instance.__dict__.get('group_id'),
+    )
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    owner = (instance.author_id, instance.group_id)
+    if created:
+        with transaction.atomic():
+            stats.increment_author(instance.author_id, 'posts_count')
+            stats.increment_group(instance.group_id, 'posts_count')
+    elif owner != instance._saved_owner:
+        stats.post_moved(instance._saved_owner, owner)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    with transaction.atomic():
+        stats.decrement_author(instance.author_id, 'posts_count')
+        stats.decrement_group(instance.group_id, 'posts_count')
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        stats.increment_author(instance.author_id, 'comments_count')
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    stats.decrement_author(instance.author_id, 'comments_count')
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, **kwargs):
+    if created:
+        with transaction.atomic():
+            stats.increment_author(instance.author_id, 'followers_count')
+            stats.increment_author(instance.user_id, 'following_count')
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    with transaction.atomic():
+        stats.decrement_author(instance.author_id, 'followers_count')
+        stats.decrement_author(instance.user_id, 'following_count')
+        resumed = feed.dropped_below_fanout(instance.author_id)
+    if resumed:
+        feed.backfill_followers(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        feed.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    feed.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_feeds(sender, instance, **kwargs):
+    scopes = set(feed.feed_scopes(instance.author_id, instance.group_id))
+    scopes.update(feed.feed_scopes(*instance._saved_owner))
+    for scope in scopes:
+        bump_version(*scope)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_group_feeds(sender, instance, **kwargs):
+    bump_version('feed')
+    bump_version('feed', 'group', instance.pk)
+
+
+@receiver(post_save, sender=User)
+def bump_author_feeds(sender, instance, created, update_fields=None,
+                      raw=False, **kwargs):
+    """Имя автора показано в лентах: переименование сбрасывает их."""
+    if created or raw or (
+        update_fields is not None
+        and not AUTHOR_FIELDS.intersection(update_fields)
+    ):
+        return
+    groups = Post.objects.filter(
+        author=instance, group__isnull=False
+    ).values_list('group_id', flat=True).distinct()
+    scopes = {('feed',), ('feed', 'author', instance.pk), ('pages',)}
+    scopes.update(('feed', 'group', group_id) for group_id in groups)
+    for scope in scopes:
+        bump_version(*scope)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_cached_pages(sender, **kwargs):
+    bump_version('pages')
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, **kwargs):
+    if instance.image:
+        thumbnails.pregenerate(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def forget_post_owner(sender, instance, **kwargs):
+    # Регистрируется последним: обработчикам выше нужен прежний владелец.
+    instance._saved_owner = (instance.author_id, instance.group_id)
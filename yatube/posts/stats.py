@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from posts.models import (
+    AuthorStats, Comment, Follow, Group, GroupStats, Post, User
+)
+
+AUTHOR_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+    'comments_count': (Comment, 'author'),
+}
+GROUP_COUNTERS = {
+    'posts_count': (Post, 'group'),
+}
+
+
+def _count(model, field):
+    counts = model.objects.filter(**{field: OuterRef('pk')}).order_by(
+    ).values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount_authors(user_ids=None):
+    """Пересчитывает счётчики авторов по данным таблиц."""
+    users = User.objects.filter(stats__isnull=True)
+    stats = AuthorStats.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+        stats = stats.filter(pk__in=user_ids)
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=pk)
+         for pk in users.values_list('pk', flat=True)),
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    return stats.update(**{
+        counter: _count(model, field)
+        for counter, (model, field) in AUTHOR_COUNTERS.items()
+    })
+
+
+def recount_groups(group_ids=None):
+    groups = Group.objects.filter(stats__isnull=True)
+    stats = GroupStats.objects.all()
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+        stats = stats.filter(pk__in=group_ids)
+    GroupStats.objects.bulk_create(
+        (GroupStats(group_id=pk)
+         for pk in groups.values_list('pk', flat=True)),
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    return stats.update(**{
+        counter: _count(model, field)
+        for counter, (model, field) in GROUP_COUNTERS.items()
+    })
+
+
+def _shift(model, recount, pk, counters, delta):
+    if pk is None:
+        return
+    updated = model.objects.filter(pk=pk).update(**{
+        counter: Greatest(F(counter) + delta, 0) for counter in counters
+    })
+    if not updated and delta > 0:
+        recount([pk])
+
+
+def increment_author(user_id, *counters):
+    _shift(AuthorStats, recount_authors, user_id, counters, 1)
+
+
+def decrement_author(user_id, *counters):
+    _shift(AuthorStats, recount_authors, user_id, counters, -1)
+
+
+def increment_group(group_id, *counters):
+    _shift(GroupStats, recount_groups, group_id, counters, 1)
+
+
+def decrement_group(group_id, *counters):
+    _shift(GroupStats, recount_groups, group_id, counters, -1)
+
+
+@transaction.atomic
+def post_moved(old, new):
+    """Переносит пост между авторами и группами в счётчиках."""
+    old_author, old_group = old
+    new_author, new_group = new
+    if old_author != new_author:
+        decrement_author(old_author, 'posts_count')
+        increment_author(new_author, 'posts_count')
+    if old_group != new_group:
+        decrement_group(old_group, 'posts_count')
+        increment_group(new_group, 'posts_count')
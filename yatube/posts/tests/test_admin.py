@@ -0,0 +1,38 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(title='test group', slug='test')
+        for i in range(3):
+            Post.objects.create(text=f'текст {i}', author=cls.admin,
+                                group=cls.group)
+        Post.objects.create(text='другое', author=cls.admin)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_search_uses_index(self):
+        response = self.client.get(self.url, {'q': 'другое'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_change_form_uses_autocomplete(self):
+        post = Post.objects.first()
+        response = self.client.get(
+            reverse('admin:posts_post_change', args=(post.pk,))
+        )
+        self.assertContains(response, 'data-ajax--url', count=2)
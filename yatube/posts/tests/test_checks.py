@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase, override_settings
+
+from posts.checks import check_thumbnail_executor
+
+LOCMEM = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}}
+SQLITE = {'default': {
+    'BACKEND': 'core.cache_backends.SQLiteCache',
+    'LOCATION': 'cache.sqlite3',
+}}
+
+
+class ThumbnailExecutorCheckTest(SimpleTestCase):
+    @override_settings(POST_THUMBNAIL_EXECUTOR='process', CACHES=LOCMEM)
+    def test_process_pool_with_locmem_is_rejected(self):
+        errors = check_thumbnail_executor(None)
+        self.assertEqual([error.id for error in errors], ['posts.E001'])
+
+    @override_settings(POST_THUMBNAIL_EXECUTOR='process', CACHES=SQLITE)
+    def test_process_pool_with_shared_cache(self):
+        self.assertEqual(check_thumbnail_executor(None), [])
+
+    @override_settings(POST_THUMBNAIL_EXECUTOR='thread', CACHES=LOCMEM)
+    def test_thread_pool_with_locmem(self):
+        self.assertEqual(check_thumbnail_executor(None), [])
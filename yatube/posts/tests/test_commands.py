@@ -0,0 +1,152 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.models import (
+    AuthorStats, Comment, Follow, Group, Post, TimelineEntry, User
+)
+from posts.search import get_backend
+
+
+class CheckFeedPlansTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        out = StringIO()
+        call_command('check_feed_plans', stdout=out)
+        self.assertNotIn('[FAIL]', out.getvalue())
+
+
+class RecountStatsTest(TestCase):
+    def test_recount_repairs_drift(self):
+        author = User.objects.create_user(username='author')
+        Post.objects.create(text='text', author=author)
+        AuthorStats.objects.filter(user=author).update(posts_count=42)
+        call_command('recount_stats', stdout=StringIO())
+        self.assertEqual(AuthorStats.objects.get(user=author).posts_count, 1)
+
+
+class RebuildSearchIndexTest(TestCase):
+    def test_rebuild_indexes_bulk_created_posts(self):
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create([Post(text='импорт', author=author)])
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertEqual(len(get_backend().search('импорт')), 1)
+
+
+class TransferPostsTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='группа', slug='group')
+        self.post = Post.objects.create(text='перенос', author=self.author,
+                                        group=self.group)
+        Comment.objects.create(text='комментарий', author=self.reader,
+                               post=self.post)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.created = Post.objects.get().created - timedelta(days=30)
+        Post.objects.update(created=self.created)
+        self.path = os.path.join(tempfile.mkdtemp(), 'dump.ndjson.gz')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.path))
+
+    def test_round_trip(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        self.assertEqual(Post.objects.count(), 0)
+        call_command('import_posts', self.path, '--batch-size', '1',
+                     stdout=StringIO(), stderr=StringIO())
+        post = Post.objects.get()
+        self.assertEqual(
+            (post.pk, post.text, post.created, post.author.username,
+             post.group.slug),
+            (self.post.pk, 'перенос', self.created, 'author', 'group')
+        )
+        reader = User.objects.get(username='reader')
+        self.assertEqual(post.comments.get().author, reader)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=reader, post=post).exists()
+        )
+        self.assertEqual(AuthorStats.objects.get(user=reader).following_count,
+                         1)
+        self.assertEqual(len(get_backend().search('перенос')), 1)
+
+    def test_post_without_author(self):
+        Post.objects.update(author=None)
+        call_command('export_posts', self.path, stderr=StringIO())
+        Post.objects.all().delete()
+        call_command('import_posts', self.path, stdout=StringIO(),
+                     stderr=StringIO())
+        self.assertIsNone(Post.objects.get().author)
+
+    def test_conflicting_ids_stop_import(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+        Post.objects.all().delete()
+        other = Post.objects.create(id=self.post.pk, text='чужой пост',
+                                    author=self.reader)
+        with self.assertRaises(CommandError):
+            call_command('import_posts', self.path, stdout=StringIO(),
+                         stderr=StringIO())
+        self.assertEqual(Post.objects.get().text, 'чужой пост')
+        self.assertFalse(other.comments.exists())
+
+    def test_import_is_idempotent(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+        call_command('import_posts', self.path, stdout=StringIO(),
+                     stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+
+class GenerateDataTest(TestCase):
+    def test_generates_power_law_dataset(self):
+        call_command(
+            'generate_data', '--users', '30', '--groups', '3',
+            '--posts', '300', '--follows', '5', '--comments', '50',
+            stdout=StringIO(), stderr=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 50)
+        top = AuthorStats.objects.order_by('-posts_count')
+        self.assertGreater(top[0].posts_count, 300 / 30 * 3)
+        self.assertTrue(TimelineEntry.objects.exists())
+
+
+class BenchmarkViewsTest(TestCase):
+    def setUp(self):
+        call_command(
+            'generate_data', '--users', '10', '--groups', '2',
+            '--posts', '30', '--follows', '3', '--comments', '10',
+            stdout=StringIO(), stderr=StringIO()
+        )
+
+    def benchmark(self, *args):
+        out = StringIO()
+        call_command('benchmark_views', '--iterations', '2', *args,
+                     stdout=out, stderr=StringIO())
+        return json.loads(out.getvalue())['views']
+
+    def test_reports_every_view(self):
+        views = self.benchmark()
+        self.assertEqual(set(views), {
+            'index', 'index_deep', 'group_list', 'profile', 'post_detail',
+            'comment_list', 'search', 'follow_index', 'post_create',
+            'post_edit',
+        })
+        for name, result in views.items():
+            with self.subTest(view=name):
+                self.assertEqual(result['status'], 200)
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+                self.assertGreater(result['queries'], 0)
+
+    def test_warm_cache_serves_pages_without_queries(self):
+        views = self.benchmark('--cache', 'warm')
+        self.assertEqual(views['index']['queries'], 0)
@@ -1,11 +1,14 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.conf import settings
+from PIL import Image
 
+from posts.forms import PostForm
 from posts.models import Post, Group, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -17,6 +20,7 @@ EXAMPLE_SMALL_GIF = (
     b'\x02\x00\x01\x00\x00\x02\x02\x0C'
     b'\x0A\x00\x3B'
 )
+CONTENT_NAME = r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.gif$'
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -63,11 +67,11 @@ class FormsTest(TestCase):
             post.text: data['text'],
             post.group: FormsTest.group,
             post.author: FormsTest.user,
-            post.image.name: Post.image.field.upload_to + uploaded.name
         }
         for attrs, excepted in attrs_equal.items():
             with self.subTest(atrs=attrs):
                 self.assertEqual(attrs, excepted)
+        self.assertRegex(post.image.name, CONTENT_NAME)
 
     def test_post_edit(self):
         new_post = Post.objects.create(
@@ -97,11 +101,24 @@ class FormsTest(TestCase):
             new_post.text: data['text'],
             new_post.group: FormsTest.group,
             new_post.author: FormsTest.user,
-            new_post.image: f'posts/{uploaded.name}'
         }
         for attr, excepted in attrs_equal.items():
             with self.subTest(attr=attr, exc=excepted):
                 self.assertEqual(attr, excepted)
+        self.assertRegex(new_post.image.name, CONTENT_NAME)
+
+    def test_same_image_stored_once(self):
+        for text in ('first', 'second'):
+            self.client.post(reverse('posts:post_create'), data={
+                'text': text,
+                'image': SimpleUploadedFile(
+                    name=f'{text}.gif',
+                    content=EXAMPLE_SMALL_GIF,
+                    content_type='image/gif'
+                )
+            })
+        first, second = Post.objects.filter(text__in=('first', 'second'))
+        self.assertEqual(first.image.name, second.image.name)
 
     def test_comments_for_guest(self):
         new_post = Post.objects.create(
@@ -119,3 +136,55 @@ class FormsTest(TestCase):
         )
         new_post.refresh_from_db()
         self.assertEqual(new_post.comments.count(), 0)
+
+
+def make_jpeg(size, exif_orientation=None):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera'
+    if exif_orientation:
+        exif[0x0112] = exif_orientation
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+@override_settings(POST_IMAGE_MAX_DIMENSION=100)
+class ImageNormalizationTest(TestCase):
+    def clean(self, content, name='photo.jpg'):
+        form = PostForm(
+            data={'text': 'test'},
+            files={'image': SimpleUploadedFile(name, content, 'image/jpeg')}
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        image_file = form.cleaned_data['image']
+        image_file.seek(0)
+        return image_file, Image.open(image_file)
+
+    def test_large_image_is_downsized_and_stripped(self):
+        image_file, image = self.clean(make_jpeg((400, 200)))
+        self.assertEqual(image_file.name, 'photo.jpg')
+        self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(image.size, (100, 50))
+        self.assertEqual(len(image.getexif()), 0)
+
+    def test_orientation_is_applied(self):
+        _, image = self.clean(make_jpeg((80, 40), exif_orientation=6))
+        self.assertEqual(image.size, (40, 80))
+
+    def test_small_gif_keeps_format(self):
+        _, image = self.clean(EXAMPLE_SMALL_GIF, name='small.gif')
+        self.assertEqual(image.format, 'GIF')
+        self.assertEqual(image.size, (2, 1))
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000)
+    def test_too_many_pixels_rejected(self):
+        form = PostForm(
+            data={'text': 'test'},
+            files={'image': SimpleUploadedFile(
+                'bomb.jpg', make_jpeg((50, 50)), 'image/jpeg'
+            )}
+        )
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'image_too_large')
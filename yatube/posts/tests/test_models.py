@@ -1,6 +1,6 @@
 from django.test import TestCase
 
-from posts.models import Group, Post, User
+from posts.models import Comment, Follow, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -54,3 +54,43 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, excepted_value
                 )
+
+
+class StatsModelTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='test group', slug='test')
+        cls.other_group = Group.objects.create(title='other', slug='other')
+
+    def assertCounters(self, stats, **expected):
+        stats.refresh_from_db()
+        for counter, value in expected.items():
+            with self.subTest(stats=stats, counter=counter):
+                self.assertEqual(getattr(stats, counter), value)
+
+    def test_counters_follow_changes(self):
+        post = Post.objects.create(text='text', author=self.author,
+                                   group=self.group)
+        comment = Comment.objects.create(text='text', author=self.reader,
+                                         post=post)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertCounters(self.author.stats, posts_count=1,
+                            followers_count=1)
+        self.assertCounters(self.reader.stats, following_count=1,
+                            comments_count=1)
+        self.assertCounters(self.group.stats, posts_count=1)
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(self.group.stats, posts_count=0)
+        self.assertCounters(self.other_group.stats, posts_count=1)
+        comment.delete()
+        follow.delete()
+        post.delete()
+        self.assertCounters(self.author.stats, posts_count=0,
+                            followers_count=0)
+        self.assertCounters(self.reader.stats, following_count=0,
+                            comments_count=0)
+        self.assertCounters(self.other_group.stats, posts_count=0)
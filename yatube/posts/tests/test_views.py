@@ -1,15 +1,28 @@
 import tempfile
 import shutil
+from unittest import mock
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 from django.core.paginator import Page
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.conf import settings
 from django import forms
 
-from posts.models import Post, Group, User, Comment, Follow
+from sorl.thumbnail.images import ImageFile
+
+from core.cache import get_version
+from core.metrics import CACHE_REQUESTS, THUMBNAIL_DURATION
+from posts.models import Post, Group, User, Comment, Follow, TimelineEntry
+from posts.search import (
+    DatabaseSearchBackend, SQLiteFTSBackend, get_backend,
+)
+from posts.thumbnails import (
+    generate, generate_post_images, generate_variants,
+)
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 EXAMPLE_SMALL_GIF = (
@@ -145,6 +158,24 @@ class PostPagesTest(TestCase):
         content_after_cache_clear = response.content
         self.assertNotEqual(content_after_cache_clear, content_before_delete)
 
+    def test_cached_feeds_follow_post_changes(self):
+        urls = (
+            reverse('posts:main'),
+            reverse('posts:group_list',
+                    kwargs={'slug': PostPagesTest.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': PostPagesTest.user.username}),
+        )
+        for url in urls:
+            self.authorized_client.get(url)
+        post = Post.objects.get(id=PostPagesTest.post.id)
+        post.text = 'edited text'
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, 'edited text')
+
     def test_context_group(self):
         response = self.authorized_client.get(reverse(
             'posts:group_list',
@@ -159,8 +190,8 @@ class PostPagesTest(TestCase):
         )
         self.assertIsInstance(response.context['page_obj'][0],
                               Post)
-        self.assertIn(PostPagesTest.small_gif.name,
-                      response.context['page_obj'][0].image.name)
+        self.assertEqual(PostPagesTest.post.image.name,
+                         response.context['page_obj'][0].image.name)
         obj = response.context['page_obj'][0]
         for test_atr, excepted_atr in self.set_dict(obj).items():
             with self.subTest(test_atr=test_atr):
@@ -177,8 +208,8 @@ class PostPagesTest(TestCase):
         )
         self.assertIsInstance(response.context['page_obj'][0],
                               Post)
-        self.assertIn(PostPagesTest.small_gif.name,
-                      response.context['page_obj'][0].image.name)
+        self.assertEqual(PostPagesTest.post.image.name,
+                         response.context['page_obj'][0].image.name)
         obj = response.context['page_obj'][0]
         for test_atr, excepted_atr in self.set_dict(obj).items():
             with self.subTest(test_atr=test_atr):
@@ -201,13 +232,92 @@ class PostPagesTest(TestCase):
             [self.assertEqual, {'post': PostPagesTest.post}],
             [self.assertIn, {'comments': comment}]
         )
-        self.assertIn(PostPagesTest.small_gif.name,
-                      response.context['post'].image.name)
+        self.assertEqual(PostPagesTest.post.image.name,
+                         response.context['post'].image.name)
         obj = response.context['post']
         for test_atr, excepted_atr in self.set_dict(obj).items():
             with self.subTest(test_atr=test_atr):
                 self.assertEqual(test_atr, excepted_atr)
 
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        url = reverse('posts:post_detail',
+                      kwargs={'post_id': PostPagesTest.post.id})
+        self.authorized_client.get(url)
+        query_counts = []
+        for total in (1, 500):
+            Comment.objects.bulk_create([
+                Comment(text='test comment',
+                        author=PostPagesTest.user_for_follow,
+                        post=PostPagesTest.post)
+                for _ in range(total - PostPagesTest.post.comments.count())
+            ])
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(url)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    @override_settings(COMMENTS_ON_PAGE=2)
+    def test_post_detail_comments_paginated(self):
+        comments = [
+            Comment.objects.create(text=f'test comment {i}',
+                                   author=PostPagesTest.user,
+                                   post=PostPagesTest.post)
+            for i in range(3)
+        ]
+        response = self.authorized_client.get(reverse(
+            'posts:post_detail',
+            kwargs={'post_id': PostPagesTest.post.id}
+        ))
+        first_page = response.context['comments']
+        self.assertEqual(list(first_page), comments[:2])
+        response = self.client.get(
+            reverse('posts:comment_list',
+                    kwargs={'post_id': PostPagesTest.post.id}),
+            {'cursor': first_page.next_cursor, 'format': 'json'}
+        )
+        self.assertEqual(
+            [comment['id'] for comment in response.json()['comments']],
+            [comments[2].id]
+        )
+        self.assertIsNone(response.json()['next_cursor'])
+
+    def test_thumbnail_rendered_after_pregeneration(self):
+        url = reverse('posts:post_detail',
+                      kwargs={'post_id': PostPagesTest.post.id})
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, '<img class="card-img')
+        self.assertContains(response, 'aspect-ratio: 960 / 339')
+        for geometry, options in settings.POST_THUMBNAIL_PRESETS:
+            generate(PostPagesTest.post.image, geometry, options)
+        response = self.authorized_client.get(url)
+        self.assertContains(response, '<img class="card-img')
+
+    def test_post_images_bump_versions_once(self):
+        post = PostPagesTest.post
+        owner = (post.author_id, post.group_id)
+        with mock.patch('posts.thumbnails.bump_version') as bump:
+            generate_post_images(post.pk, ImageFile(post.image), owner, True)
+        self.assertCountEqual(
+            [call.args for call in bump.call_args_list],
+            [('pages',), ('feed',), ('feed', 'author', post.author_id),
+             ('feed', 'group', post.group_id)]
+        )
+        with mock.patch('posts.thumbnails.bump_version') as bump:
+            generate_post_images(post.pk, ImageFile(post.image), owner, False)
+        bump.assert_not_called()
+
+    def test_image_variants_rendered_as_srcset(self):
+        generated = THUMBNAIL_DURATION.count('variants')
+        generate_variants(PostPagesTest.post.id)
+        self.assertEqual(THUMBNAIL_DURATION.count('variants'), generated + 1)
+        post = Post.objects.get(id=PostPagesTest.post.id)
+        self.assertEqual(post.image_srcset['srcset'].count('w,'), 2)
+        response = self.authorized_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': post.id}
+        ))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, post.image_srcset['webp_srcset'])
+
     def test_context_post_edit(self):
         response = self.authorized_client.get(reverse(
             'posts:post_edit',
@@ -302,6 +412,95 @@ class PostPagesTest(TestCase):
         self.assertIsInstance(response.context['page_obj'], Page)
         self.assertNotIn(post, response.context['page_obj'])
 
+    def test_follow_fills_and_unfollow_prunes_timeline(self):
+        post = Post.objects.create(
+            text='test text',
+            author=PostPagesTest.user_for_follow
+        )
+        timeline = TimelineEntry.objects.filter(user=PostPagesTest.user)
+        self.authorized_client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': PostPagesTest.user_for_follow.username}
+        ))
+        self.assertEqual(list(timeline.values_list('post', flat=True)),
+                         [post.id])
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': PostPagesTest.user_for_follow.username}
+        ))
+        self.assertFalse(timeline.exists())
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0)
+    def test_celebrity_posts_pulled_on_read(self):
+        Follow.objects.create(
+            user=PostPagesTest.user,
+            author=PostPagesTest.user_for_follow
+        )
+        post = Post.objects.create(
+            text='test text',
+            author=PostPagesTest.user_for_follow
+        )
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual([post], list(response.context['page_obj']))
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0, FOLLOW_FEED_PULL_LIMIT=2)
+    def test_celebrity_pull_is_bounded(self):
+        posts = [
+            Post.objects.create(text=f'post {number}',
+                                author=PostPagesTest.user_for_follow)
+            for number in range(3)
+        ]
+        Follow.objects.create(
+            user=PostPagesTest.user,
+            author=PostPagesTest.user_for_follow
+        )
+        self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=PostPagesTest.user
+            ).values_list('post', flat=True)),
+            {posts[1].pk, posts[2].pk}
+        )
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0, FOLLOW_FEED_PULL_LIMIT=2)
+    def test_celebrity_pull_fills_gap_between_visits(self):
+        Follow.objects.create(
+            user=PostPagesTest.user,
+            author=PostPagesTest.user_for_follow
+        )
+        posts = [Post.objects.create(text='first',
+                                     author=PostPagesTest.user_for_follow)]
+        self.authorized_client.get(reverse('posts:follow_index'))
+        posts += [
+            Post.objects.create(text=f'post {number}',
+                                author=PostPagesTest.user_for_follow)
+            for number in range(3)
+        ]
+        self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=PostPagesTest.user
+            ).values_list('post', flat=True)),
+            {post.pk for post in posts}
+        )
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=1)
+    def test_author_below_fanout_limit_is_backfilled(self):
+        author = PostPagesTest.user_for_follow
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=PostPagesTest.user, author=author)
+        Follow.objects.create(user=reader, author=author)
+        post = Post.objects.create(text='test text', author=author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        Follow.objects.filter(user=reader, author=author).delete()
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(post=post).values_list(
+                'user', flat=True
+            )),
+            [PostPagesTest.user.pk]
+        )
+
 
 class PaginatorPagesTest(TestCase):
     @classmethod
@@ -334,6 +533,7 @@ class PaginatorPagesTest(TestCase):
 
     def setUp(self):
         self.client = Client()
+        cache.clear()
 
     def test_pages_paginator(self):
         for reverse_name in self.TEST_PAGES:
@@ -348,3 +548,149 @@ class PaginatorPagesTest(TestCase):
                     self.assertEqual(
                         len(response.context['page_obj']), excepted_count
                     )
+
+
+@override_settings(POSTS_CURSOR_PAGINATION=True)
+class CursorPaginatorPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='slug'
+        )
+        Post.objects.bulk_create([Post(text=f'test text {i}',
+                                       author=cls.user,
+                                       group=cls.group) for i in range(15)])
+        cls.TEST_PAGES = [
+            reverse('posts:main'),
+            reverse('posts:group_list', kwargs={
+                'slug': cls.group.slug
+            }),
+            reverse('posts:profile', kwargs={
+                'username': cls.user.username
+            })
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_pages_cursor_paginator(self):
+        expected = list(Post.objects.order_by('-created', '-id'))
+        for reverse_name in self.TEST_PAGES:
+            with self.subTest(reverse_name=reverse_name):
+                first = self.client.get(reverse_name).context['page_obj']
+                self.assertEqual(list(first), expected[:10])
+                self.assertFalse(first.has_previous())
+                second = self.client.get(
+                    reverse_name + f'?cursor={first.next_cursor}'
+                ).context['page_obj']
+                self.assertEqual(list(second), expected[10:])
+                self.assertFalse(second.has_next())
+                back = self.client.get(
+                    reverse_name + f'?cursor={second.previous_cursor}'
+                ).context['page_obj']
+                self.assertEqual(list(back), expected[:10])
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.client.get(reverse('posts:main') + '?cursor=broken')
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_made_up_cursors_share_fragment(self):
+        self.client.force_login(self.user)
+        misses = CACHE_REQUESTS.value('fragment', 'miss')
+        for cursor in ('', 'broken', 'WyJuIixbXV0'):
+            self.client.get(reverse('posts:main') + f'?cursor={cursor}')
+        self.assertEqual(CACHE_REQUESTS.value('fragment', 'miss'),
+                         misses + 1)
+
+    def test_author_rename_refreshes_feeds(self):
+        for url in self.TEST_PAGES[:2]:
+            self.client.get(url)
+        self.user.first_name = 'Переименованный'
+        self.user.save()
+        for url in self.TEST_PAGES[:2]:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Переименованный')
+
+    def test_login_keeps_feeds(self):
+        version = get_version('feed')
+        self.client.force_login(self.user)
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(get_version('feed'), version)
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test')
+        cls.match = Post.objects.create(
+            text='Пишем про кошек и про котов', author=cls.user
+        )
+        cls.better = Post.objects.create(
+            text='Кошек много, кошек любят все', author=cls.user
+        )
+        Post.objects.create(text='Совсем про собак', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query, **params):
+        return self.client.get(reverse('posts:search'),
+                               {'q': query, **params})
+
+    def test_search_ranks_matches(self):
+        response = self.search('КОШЕК')
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.better, self.match])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.get(pk=self.match.pk)
+        post.text = 'теперь про собак'
+        post.save()
+        Post.objects.get(pk=self.better.pk).delete()
+        self.assertEqual(len(self.search('кошек').context['page_obj']), 0)
+        self.assertEqual(
+            len(self.search('собак').context['page_obj']), 2
+        )
+
+    # реплика — та же база: проверяется только, что чтение не пинит
+    @override_settings(DATABASE_REPLICAS=['default'])
+    def test_search_does_not_pin_to_primary(self):
+        response = self.search('кошек')
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertEqual(response.cookies, {})
+
+    def test_search_is_not_page_cached(self):
+        self.search('кошек')
+        with CaptureQueriesContext(connection) as queries:
+            self.search('кошек')
+        self.assertTrue(queries)
+
+    def test_query_operators_are_quoted(self):
+        response = self.search('кошек" OR NEAR(')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    @override_settings(POSTS_ON_PAGE=1)
+    def test_pagination_keeps_query(self):
+        response = self.search('кошек', page=2)
+        self.assertEqual(list(response.context['page_obj']), [self.match])
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%88%D0%B5%D0%BA'
+                                      '&amp;page=1')
+
+    @override_settings(
+        POSTS_SEARCH_BACKEND='posts.search.DatabaseSearchBackend'
+    )
+    def test_database_backend(self):
+        response = self.search('собак')
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+    @override_settings(POSTS_SEARCH_BACKEND=None)
+    def test_default_backend_follows_database_vendor(self):
+        self.assertIsInstance(get_backend(), SQLiteFTSBackend)
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertIsInstance(get_backend(), DatabaseSearchBackend)
@@ -0,0 +1,194 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import db_router
+from core.cache import bump_version
+from core.metrics import THUMBNAIL_DURATION
+from posts.feed import feed_scopes
+from posts.models import Post
+
+logger = logging.getLogger(__name__)
+
+WEBP = {'format': 'WEBP'}
+DEFAULT_WIDTH = 960
+
+_executor = None
+_lock = threading.Lock()
+_pending = set()
+
+
+def bump_post_versions(owners):
+    """Сбрасывает ленты и страницы, где могла остаться заглушка.
+
+    owners — пары (author_id, group_id) постов с новой картинкой.
+    """
+    scopes = {('pages',)}
+    for author_id, group_id in owners:
+        scopes.update(feed_scopes(author_id, group_id))
+    for scope in scopes:
+        bump_version(*scope)
+
+
+def generate(source, geometry, options):
+    """Режет миниатюру; True, если её ещё не было в хранилище."""
+    ready = DeferredThumbnailBackend().get_ready_thumbnail(
+        source, geometry, **options
+    )
+    if ready is not None:
+        return False
+    start = time.perf_counter()
+    try:
+        ThumbnailBackend().get_thumbnail(source, geometry, **options)
+    except Exception:
+        logger.exception('Thumbnail generation failed for %s', source)
+        return False
+    finally:
+        THUMBNAIL_DURATION.observe(time.perf_counter() - start, 'thumbnail')
+    return True
+
+
+def generate_variants(post_id):
+    """Режет картинку поста на ширины POST_IMAGE_VARIANTS в исходном
+    формате и в WebP и записывает их список в Post.image_variants.
+    Возвращает True, если список записан."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return False
+    backend = ThumbnailBackend()
+    variants = {'source': post.image.name, 'fallback': [], 'webp': []}
+    start = time.perf_counter()
+    try:
+        for geometry in settings.POST_IMAGE_VARIANTS:
+            width = int(geometry.split('x')[0])
+            for kind, options in (('fallback', {}), ('webp', WEBP)):
+                thumbnail = backend.get_thumbnail(
+                    post.image, geometry, crop='center', upscale=True,
+                    **options
+                )
+                variants[kind].append([width, thumbnail.name])
+                if kind == 'fallback' and width == DEFAULT_WIDTH:
+                    variants['src'] = thumbnail.name
+    except Exception:
+        logger.exception('Image variants failed for post %s', post_id)
+        return False
+    THUMBNAIL_DURATION.observe(time.perf_counter() - start, 'variants')
+    variants.setdefault('src', variants['fallback'][-1][1])
+    return bool(Post.objects.filter(pk=post_id, image=post.image.name).update(
+        image_variants=json.dumps(variants)
+    ))
+
+
+def generate_post_images(post_id, source, owner, variants):
+    """Все миниатюры и варианты поста; версии кеша сдвигаются один раз
+    и только если что-то было нарезано."""
+    created = False
+    for geometry, options in settings.POST_THUMBNAIL_PRESETS:
+        created |= generate(source, geometry, options)
+    if variants:
+        created |= generate_variants(post_id)
+    if created:
+        bump_post_versions([owner])
+
+
+def generate_missing(source, geometry, options):
+    # пост неизвестен: шаблон просит миниатюру по одному файлу
+    if generate(source, geometry, options):
+        bump_post_versions([(None, None)])
+
+
+def _work(func, *args):
+    """Выполняется в фоновом потоке или процессе."""
+    try:
+        # реплика может ещё не знать о только что сохранённом посте
+        with db_router.primary():
+            func(*args)
+    finally:
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = settings.POST_THUMBNAIL_WORKERS
+            if settings.POST_THUMBNAIL_EXECUTOR == 'process':
+                _executor = ProcessPoolExecutor(
+                    workers, initializer=connections.close_all
+                )
+            else:
+                _executor = ThreadPoolExecutor(
+                    workers, thread_name_prefix='thumbnails'
+                )
+        return _executor
+
+
+def _submit(task, func, *args):
+    if settings.POST_THUMBNAIL_EXECUTOR == 'sync':
+        func(*args)
+        return
+    with _lock:
+        if task in _pending:
+            return
+        _pending.add(task)
+    future = _get_executor().submit(_work, func, *args)
+    future.add_done_callback(lambda future: _pending.discard(task))
+
+
+def _on_commit(task, func, *args):
+    transaction.on_commit(lambda: _submit(task, func, *args))
+
+
+def schedule(file_, geometry, **options):
+    """Ставит миниатюру в очередь после фиксации транзакции."""
+    source = ImageFile(file_)
+    task = (source.key, geometry, repr(sorted(options.items())))
+    _on_commit(task, generate_missing, source, geometry, options)
+
+
+def pregenerate(post):
+    """Ставит в очередь миниатюры и варианты картинки поста."""
+    _on_commit(
+        ('post', post.pk), generate_post_images, post.pk,
+        ImageFile(post.image), (post.author_id, post.group_id),
+        not post.get_image_variants()
+    )
+
+
+class DeferredThumbnailBackend(ThumbnailBackend):
+    """Не режет картинки во время запроса.
+
+    Готовая миниатюра берётся из хранилища ключей sorl; если её ещё нет,
+    генерация уходит в фон, а шаблон показывает заглушку из {% empty %}.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        thumbnail = self.get_ready_thumbnail(
+            file_, geometry_string, **options
+        )
+        if thumbnail is None:
+            schedule(file_, geometry_string, **options)
+        return thumbnail
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
@@ -25,6 +25,11 @@ urlpatterns = [
         views.post_detail,
         name='post_detail'
     ),
+    path(
+        'search/',
+        views.search,
+        name='search'
+    ),
     path(
         'create/',
         views.post_create,
@@ -40,6 +45,11 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comment_list,
+        name='comment_list'
+    ),
     path(
         'follow/',
         views.follow_index,
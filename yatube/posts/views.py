@@ -1,20 +1,54 @@
+from django.conf import settings
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.db.models.query import QuerySet
+from django.utils.http import urlencode
 
+from core import db_router
+from core.cache import versioned_key
+from core.paginator import CachedCountPaginator, KeysetPaginator
+from posts.feed import TIMELINE_ORDERING, timeline
 from posts.forms import PostForm, CommentForm
 from posts.models import Post, Group, User, Follow
-from yatube.settings import POSTS_ON_PAGE as POSTS
+from posts.search import get_backend
 
 
-def create_page_obj_from_paginator(posts: QuerySet, request):
-    return Paginator(posts, POSTS).get_page(request.GET.get('page'))
+def create_page_obj_from_paginator(posts: QuerySet, request,
+                                   ordering=('-created', '-id'),
+                                   count_scope=None):
+    if settings.POSTS_CURSOR_PAGINATION:
+        return KeysetPaginator(
+            posts, settings.POSTS_ON_PAGE, ordering
+        ).get_page(
+            request.GET.get('cursor')
+        )
+    if count_scope is None:
+        paginator = Paginator(posts, settings.POSTS_ON_PAGE)
+    else:
+        paginator = CachedCountPaginator(
+            posts,
+            settings.POSTS_ON_PAGE,
+            versioned_key('feed_count', *count_scope),
+            settings.FEED_CACHE_TIMEOUT
+        )
+    return paginator.get_page(request.GET.get('page'))
+
+
+def create_comments_page(post, cursor):
+    return KeysetPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_ON_PAGE,
+        ('created', 'id')
+    ).get_page(cursor)
 
 
 def index(request):
     posts = Post.objects.select_related('author', 'group')
-    page_obj = create_page_obj_from_paginator(posts, request)
+    page_obj = create_page_obj_from_paginator(
+        posts, request, count_scope=('feed',)
+    )
     context = {
         'page_obj': page_obj
     }
@@ -24,7 +58,9 @@ def index(request):
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author')
-    page_obj = create_page_obj_from_paginator(posts, request)
+    page_obj = create_page_obj_from_paginator(
+        posts, request, count_scope=('feed', 'group', group.pk)
+    )
     context = {
         'group': group,
         'page_obj': page_obj
@@ -33,13 +69,18 @@ def group_posts(request, slug):
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
         author=author
     ).exists()
     posts = author.posts.select_related('group')
-    page_obj = create_page_obj_from_paginator(posts, request)
+    page_obj = create_page_obj_from_paginator(
+        posts, request, count_scope=('feed', 'author', author.pk)
+    )
     context = {
         'following': following,
         'profile_author': author,
@@ -49,8 +90,11 @@ def profile(request, username):
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        id=post_id
+    )
+    comments = create_comments_page(post, None)
     form = CommentForm()
     context = {
         'post': post,
@@ -60,12 +104,50 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_id.html', context)
 
 
+def comment_list(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    comments = create_comments_page(post, request.GET.get('cursor'))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created.isoformat(),
+                }
+                for comment in comments
+            ],
+            'next_cursor': comments.next_cursor,
+        })
+    context = {
+        'post': post,
+        'comments': comments
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = Paginator(
+            get_backend().search(query), settings.POSTS_ON_PAGE
+        ).get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_prefix': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None,
                     files=request.FILES or None)
     if form.is_valid():
-        post = form.save()
+        post = form.save(commit=False)
         post.author = request.user
         post.save()
         return redirect('posts:profile', post.author)
@@ -105,14 +187,18 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    page_obj = create_page_obj_from_paginator(
-        Post.objects.filter(author__following__user=request.user),
-        request
-    )
-    context = {
-        'page_obj': page_obj
-    }
-    return render(request, 'posts/follow.html', context)
+    # лента только что дописана в основную базу, реплика может отставать
+    with db_router.primary():
+        page_obj = create_page_obj_from_paginator(
+            timeline(request.user),
+            request,
+            TIMELINE_ORDERING
+        )
+        page_obj.object_list = [entry.post for entry in page_obj]
+        context = {
+            'page_obj': page_obj
+        }
+        return render(request, 'posts/follow.html', context)
 
 
 @login_required
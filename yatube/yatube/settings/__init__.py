@@ -0,0 +1,15 @@
+"""Набор настроек выбирает переменная окружения DJANGO_ENV: dev или prod."""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+ENVIRONMENT = os.getenv('DJANGO_ENV', 'dev')
+
+if ENVIRONMENT == 'prod':
+    from .prod import *
+elif ENVIRONMENT == 'dev':
+    from .dev import *
+else:
+    raise ImproperlyConfigured(
+        f'DJANGO_ENV={ENVIRONMENT}: ожидается dev или prod.'
+    )
@@ -0,0 +1,257 @@
+"""Общие настройки; dev.py и prod.py дополняют их.
+
+Всё, что отличается между машинами, берётся из переменных окружения
+с префиксом DJANGO_.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+STATICFILES_DIRS = [os.path.join(os.path.dirname(BASE_DIR), 'static')]
+
+
+def env_list(name, default=()):
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def env_required(name):
+    value = os.getenv(name)
+    if not value:
+        raise ImproperlyConfigured(f'Не задана переменная окружения {name}.')
+    return value
+
+
+DEBUG = False
+
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS')
+
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'about',
+    'posts',
+    'users',
+    'core',
+    'sorl.thumbnail'
+]
+
+MIDDLEWARE = [
+    'core.middleware.AnonymousPageCacheMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.NPlusOneMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
+    'core.middleware.RequestProfilingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year'
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+# Сколько секунд держать соединение с базой между запросами; 0 — закрывать
+# после каждого запроса, None — не закрывать никогда.
+CONN_MAX_AGE = os.getenv('DJANGO_CONN_MAX_AGE', '60')
+CONN_MAX_AGE = None if CONN_MAX_AGE == 'none' else int(CONN_MAX_AGE)
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+    }
+}
+
+# Применяются к каждому новому соединению SQLite (core.signals).
+# WAL позволяет читать во время записи, synchronous=NORMAL в режиме WAL
+# не теряет целостность при сбое, а busy_timeout ждёт блокировку вместо
+# немедленной ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Реплики только для чтения. Локально YATUBE_SQLITE_REPLICAS=N добавляет
+# N файлов SQLite, которые наполняет команда sync_replicas.
+DATABASE_REPLICAS = []
+for number in range(1, int(os.getenv('YATUBE_SQLITE_REPLICAS', 0)) + 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.{alias}.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# DJANGO_CACHE_BACKEND выбирает кеш, DJANGO_CACHE_LOCATION — его адрес.
+# locmem у каждого воркера свой, поэтому при нескольких воркерах ленты и
+# страницы кешируются в общем для всех воркеров машины хранилище без
+# отдельного сервера: sqlite — один файл с LRU и атомарным incr, file и
+# shm — файл на запись, shm держит их в /dev/shm.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'yatube'),
+    'file': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        os.path.join(BASE_DIR, 'cache'),
+    ),
+    'sqlite': (
+        'core.cache_backends.SQLiteCache',
+        os.path.join(BASE_DIR, 'cache.sqlite3'),
+    ),
+    'shm': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        '/dev/shm/yatube-cache',
+    ),
+    'dummy': ('django.core.cache.backends.dummy.DummyCache', ''),
+}
+
+
+def cache_settings(default):
+    name = os.getenv('DJANGO_CACHE_BACKEND', default)
+    if name not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(
+            f'DJANGO_CACHE_BACKEND={name}: ожидается одно из '
+            f'{", ".join(CACHE_BACKENDS)}.'
+        )
+    backend, location = CACHE_BACKENDS[name]
+    return {
+        'default': {
+            'BACKEND': backend,
+            'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', location),
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.getenv('DJANGO_CACHE_MAX_ENTRIES', 5000)),
+            },
+        }
+    }
+
+
+CACHES = cache_settings('locmem')
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+LANGUAGE_CODE = 'ru-RU'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+
+POSTS_ON_PAGE = 10
+POSTS_CURSOR_PAGINATION = False
+
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+# Поиск сюда не входит: каждый запрос q лёг бы в общий кеш отдельной
+# страницей и вытеснял бы ленты.
+PAGE_CACHE_VIEWS = [
+    'posts:main',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+]
+
+REQUEST_PROFILING_SAMPLE_RATE = 0.01
+NPLUSONE_MODE = None
+NPLUSONE_NAMESPACES = ['posts']
+NPLUSONE_THRESHOLD = 3
+# хранилище ключей sorl ищет миниатюры по одной; промахи временные
+NPLUSONE_IGNORE = ['thumbnail_kvstore']
+# None открывает /metrics всем; за прокси проверяйте доступ на нём
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+# При нескольких воркерах — общий каталог для снимков метрик (core.metrics);
+# очищается перед запуском сервера.
+METRICS_DIR = os.getenv('DJANGO_METRICS_DIR') or None
+
+COMMENTS_ON_PAGE = 20
+# None — FTS5 на SQLite, LIKE на остальных СУБД
+POSTS_SEARCH_BACKEND = None
+POSTS_SEARCH_MAX_TERMS = 10
+
+FOLLOW_FEED_FANOUT_LIMIT = 1000
+FOLLOW_FEED_PULL_LIMIT = 100
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:main'
+
+EMAIL_BACKEND = 'django.core.mail.backends.XXX'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.DeferredThumbnailBackend'
+# 'process' требует общего для процессов кеша (проверка posts.E001):
+# готовая миниатюра сдвигает версии лент и страниц из дочернего процесса.
+POST_THUMBNAIL_EXECUTOR = 'thread'
+POST_THUMBNAIL_WORKERS = 2
+POST_THUMBNAIL_PRESETS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+POST_IMAGE_VARIANTS = ['480x170', '960x339', '1440x509']
+POST_IMAGE_MAX_DIMENSION = 2048
+POST_IMAGE_MAX_PIXELS = 40_000_000
+POST_IMAGE_JPEG_QUALITY = 85
@@ -0,0 +1,18 @@
+"""Локальная разработка и тесты."""
+from .base import *
+
+SECRET_KEY = os.getenv(
+    'DJANGO_SECRET_KEY', '54qdfk9umgubg%d4n#dn8do53g%imqlo5gdmtrv&a@*_-jy$!r'
+)
+
+DEBUG = True
+
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS', [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+])
+
+REQUEST_PROFILING_SAMPLE_RATE = 1.0
+NPLUSONE_MODE = 'log'
@@ -0,0 +1,42 @@
+"""Боевые воркеры.
+
+DEBUG выключен: Django не копит SQL каждого запроса в connection.queries,
+а шаблоны компилируются один раз на процесс кешированным загрузчиком.
+"""
+import copy
+
+from .base import *
+
+SECRET_KEY = env_required('DJANGO_SECRET_KEY')
+
+DEBUG = False
+
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS', ['localhost'])
+
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+CACHES = cache_settings('sqlite')
+
+REQUEST_PROFILING_SAMPLE_RATE = float(
+    os.getenv('DJANGO_PROFILING_SAMPLE_RATE', REQUEST_PROFILING_SAMPLE_RATE)
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+    'loggers': {
+        'core.profiling': {'level': 'INFO'},
+        'django.db.backends': {'level': 'WARNING'},
+    },
+}
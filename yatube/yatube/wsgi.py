@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if os.getenv('DJANGO_WARM_TEMPLATES', '1') == '1':
+    from core.template_warmup import warm
+
+    warm()